@@ -0,0 +1,275 @@
+"""Benchmarks for DriveWidget refresh latency, memory and startup.
+
+Runs the real widget under the offscreen Qt platform against a fake psutil
+provider that simulates any number of drives, some of them slow or dead
+shares, then times each drive provider backend against the host's real
+mounts. Results are written as JSON so runs can be compared across versions:
+
+    python DriveBench.py --drives 10 100 1000 --ticks 20 --output bench_results.json
+"""
+import os, sys, json, time, platform, argparse, tempfile, subprocess, statistics
+from collections import namedtuple
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import psutil
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+FakePartition = namedtuple("FakePartition", "device mountpoint fstype opts")
+FakeUsage = namedtuple("FakeUsage", "total used free percent")
+
+
+class FakeDisks:
+    """Stand-in for psutil's partition and usage calls.
+
+    Every ``slow_every``-th drive is a share whose stat blocks for
+    ``slow_seconds``, longer than the widget's per-drive timeout by default.
+    Free space drifts a little on every call so each tick has real updates.
+    """
+
+    def __init__(self, count, slow_every=0, slow_seconds=5.0):
+        self.devices = [f"\\\\bench\\share{i:04d}" for i in range(count)]
+        self.slow = {d for i, d in enumerate(self.devices) if slow_every and i % slow_every == slow_every - 1}
+        self.slow_seconds = slow_seconds
+        self.calls = 0
+        self._real = (psutil.disk_partitions, psutil.disk_usage)
+
+    def disk_partitions(self, all=False):
+        return [FakePartition(d, d, "ntfs", "rw") for d in self.devices]
+
+    def disk_usage(self, path):
+        self.calls += 1
+        if path in self.slow:
+            time.sleep(self.slow_seconds)
+        total = 500 * 1024**3
+        free = (10 + (hash(path) + self.calls) % 200) * 1024**3
+        return FakeUsage(total, total - free, free, round((total - free) / total * 100, 1))
+
+    def install(self):
+        psutil.disk_partitions = self.disk_partitions
+        psutil.disk_usage = self.disk_usage
+
+    def uninstall(self):
+        psutil.disk_partitions, psutil.disk_usage = self._real
+
+
+def rss_bytes():
+    return psutil.Process().memory_info().rss
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def wait_until(app, predicate, timeout):
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.0005)
+    return predicate()
+
+
+def bench_drive_count(app, count, ticks, slow_every, slow_seconds, idle_seconds):
+    from PyQt6.QtCore import QObject, QEvent, QEventLoop, QTimer
+    import DriveWidget as dw
+
+    fake = FakeDisks(count, slow_every, slow_seconds)
+    fake.install()
+    try:
+        class PaintProbe(QObject):
+            painted_at = None
+
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Type.Paint and self.painted_at is None:
+                    self.painted_at = time.perf_counter()
+                return False
+
+        probe = PaintProbe()
+        start = time.perf_counter()
+        collector = dw.DriveCollector()
+        window = collector.open_view()
+        window.installEventFilter(probe)
+        wait_until(app, lambda: probe.painted_at is not None, 10.0)
+        first_paint_ms = ((probe.painted_at or time.perf_counter()) - start) * 1000.0
+
+        collector.timer.stop()
+        settled = lambda: collector.sampler.pending_count() <= len(fake.slow)
+        wait_until(app, settled, 30.0)
+
+        rss_start = rss_bytes()
+        refresh_ms, settle_ms, cpu_ms = [], [], []
+        for _ in range(ticks):
+            collector.scheduler.expedite()
+            c0 = time.process_time()
+            t0 = time.perf_counter()
+            collector.refresh_drives()
+            t1 = time.perf_counter()
+            wait_until(app, settled, 30.0)
+            t2 = time.perf_counter()
+            refresh_ms.append((t1 - t0) * 1000.0)
+            settle_ms.append((t2 - t0) * 1000.0)
+            cpu_ms.append((time.process_time() - c0) * 1000.0)
+        rss_end = rss_bytes()
+
+        # Left alone on screen with the real poll timer: sampling, I/O
+        # polling and repainting whatever changed
+        collector.timer.start()
+        c0, t0 = time.process_time(), time.perf_counter()
+        idle = QEventLoop()
+        QTimer.singleShot(int(idle_seconds * 1000), idle.quit)
+        idle.exec()
+        idle_cpu = (time.process_time() - c0) / (time.perf_counter() - t0) * 100.0
+        collector.timer.stop()
+
+        toggle_ms = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            window.toggle_window()
+            window.toggle_window()
+            app.processEvents()
+            toggle_ms.append((time.perf_counter() - t0) * 1000.0)
+
+        result = {
+            "drives": count,
+            "slow_drives": len(fake.slow),
+            "ticks": ticks,
+            "first_paint_ms": round(first_paint_ms, 3),
+            "refresh": summarize(refresh_ms),
+            "refresh_until_settled": summarize(settle_ms),
+            "cpu_per_tick": summarize(cpu_ms),
+            "idle_cpu_percent": round(idle_cpu, 2),
+            "toggle_round_trip": summarize(toggle_ms),
+            "qt_objects": len(window.findChildren(QObject)) + len(collector.findChildren(QObject)),
+            "rss_start_bytes": rss_start,
+            "rss_growth_bytes": rss_end - rss_start,
+        }
+
+        collector.sampler.stop()
+        window.hide()
+        window.deleteLater()
+        collector.deleteLater()
+        app.processEvents()
+        return result
+    finally:
+        fake.uninstall()
+
+
+def bench_providers(count, ticks):
+    """Per-tick cost of each drive provider that works here, against the real
+    mounts of this host: one enumeration plus a stat of ``count`` paths
+    (the host's mount points, repeated), the way a batched tick does it."""
+    from DriveCore import PROVIDERS
+
+    results = []
+    for name, cls in PROVIDERS.items():
+        provider = cls()
+        try:
+            mounts = [p.mountpoint for p in provider.partitions()]
+        except Exception as e:
+            print(f"  {name} provider unavailable: {e}")
+            continue
+        if not mounts:
+            continue
+        paths = [mounts[i % len(mounts)] for i in range(count)]
+
+        enumerate_ms, stat_ms = [], []
+        for _ in range(ticks):
+            t0 = time.perf_counter()
+            provider.partitions()
+            t1 = time.perf_counter()
+            provider.usage_many(paths)
+            t2 = time.perf_counter()
+            enumerate_ms.append((t1 - t0) * 1000.0)
+            stat_ms.append((t2 - t1) * 1000.0)
+
+        results.append({
+            "provider": name,
+            "mounts": len(mounts),
+            "paths": count,
+            "enumerate": summarize(enumerate_ms),
+            "stat": summarize(stat_ms),
+        })
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", HERE, "describe", "--always", "--dirty"],
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drives", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--slow-every", type=int, default=10,
+                        help="make every Nth drive a slow share (0 disables)")
+    parser.add_argument("--slow-seconds", type=float, default=5.0)
+    parser.add_argument("--view", choices=["rows", "list"], default="rows",
+                        help="benchmark the widget rows or the virtualized list")
+    parser.add_argument("--render", choices=["effect", "cached"], default="effect",
+                        help="live drop shadow effect or the cached panel background")
+    parser.add_argument("--idle-seconds", type=float, default=3.0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    from PyQt6.QtWidgets import QApplication
+
+    output = os.path.abspath(args.output)
+
+    # Keep the widget's config and history files out of the working tree
+    os.chdir(tempfile.mkdtemp(prefix="drivebench-"))
+    # The fake disks stand in for psutil, so the widget runs on that backend
+    with open("drive_data.json", "w") as f:
+        json.dump({"view": args.view, "render": args.render, "provider": "psutil"}, f)
+
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    app.setStyle("Fusion")
+
+    runs = []
+    for count in args.drives:
+        result = bench_drive_count(app, count, args.ticks, args.slow_every, args.slow_seconds, args.idle_seconds)
+        runs.append(result)
+        print(f"{count:>5} drives: refresh {result['refresh']['median_ms']:.2f} ms, "
+              f"settled {result['refresh_until_settled']['median_ms']:.2f} ms, "
+              f"CPU {result['cpu_per_tick']['median_ms']:.2f} ms per tick, {result['idle_cpu_percent']:.1f}% idle, "
+              f"first paint {result['first_paint_ms']:.1f} ms, "
+              f"{result['qt_objects']} Qt objects, "
+              f"RSS +{result['rss_growth_bytes'] / 1024:.0f} KiB over {args.ticks} ticks")
+
+    providers = []
+    for count in args.drives:
+        for result in bench_providers(count, args.ticks):
+            providers.append(result)
+            print(f"{count:>5} paths, {result['provider']:>6} provider: "
+                  f"enumerate {result['enumerate']['median_ms']:.2f} ms, "
+                  f"stat {result['stat']['median_ms']:.2f} ms per tick")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+        "view": args.view,
+        "render": args.render,
+        "runs": runs,
+        "providers": providers,
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
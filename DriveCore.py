@@ -0,0 +1,1746 @@
+import sys, os, re, json, errno, threading, select, time, struct, heapq, queue, fnmatch
+from array import array
+from collections import namedtuple, OrderedDict
+
+# psutil, argparse, subprocess and http.server are imported where they are
+# used; none of them is needed to get the first frame on screen
+
+CONFIG_FILE = "drive_data.json"
+HISTORY_FILE = "drive_history.bin"
+SNAPSHOT_FILE = "drive_snapshot.json"
+AGENT_PORT = 9470
+PROTOCOL_VERSION = 1
+
+# Same fields as psutil's disk_usage and disk_partitions results, for
+# values from the native providers or restored from disk
+DiskUsage = namedtuple("DiskUsage", "total used free percent")
+Partition = namedtuple("Partition", "device mountpoint fstype opts")
+
+# Smoothed per-second rates of one physical disk
+IORates = namedtuple("IORates", "read_bps write_bps iops")
+
+
+class ConfigStore:
+    """Dirty-tracked, crash-safe persistence for ``CONFIG_FILE``.
+
+    ``save`` is a no-op unless the data differs from what was last written.
+    Writes go to a temp file that is renamed over the config, and the
+    previous good config is kept as ``<file>.bak`` so a torn or corrupt
+    file can be recovered on the next ``load``.
+    """
+
+    def __init__(self, path=CONFIG_FILE):
+        self.path = path
+        self.backup_path = path + ".bak"
+        self._saved = None  # serialized form of what is on disk
+        self._main_ok = False
+
+    def _serialize(self, data):
+        return json.dumps(data, indent=4)
+
+    def _read(self, path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                data = self._read(self.path)
+                self._main_ok = True
+                self._saved = self._serialize(data)
+                return data
+            except Exception as e:
+                print(f"Config Load Error: {e}", file=sys.stderr)
+        if os.path.exists(self.backup_path):
+            try:
+                data = self._read(self.backup_path)
+                print(f"Recovered settings from {self.backup_path}", file=sys.stderr)
+                return data
+            except Exception as e:
+                print(f"Backup Load Error: {e}", file=sys.stderr)
+        return {}
+
+    def is_dirty(self, data):
+        return self._serialize(data) != self._saved
+
+    def save(self, data):
+        text = self._serialize(data)
+        if text == self._saved:
+            return False
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Only a config that loaded or was written cleanly becomes the backup
+        if self._main_ok and os.path.exists(self.path):
+            os.replace(self.path, self.backup_path)
+        os.replace(tmp_path, self.path)
+
+        self._saved = text
+        self._main_ok = True
+        return True
+
+
+class UsageRing:
+    """Fixed-capacity ring of (timestamp, free bytes) samples for one drive."""
+    __slots__ = ("times", "free", "start", "count", "total")
+
+    def __init__(self, capacity):
+        self.times = array("d", bytes(8 * capacity))
+        self.free = array("q", bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+        self.total = 0
+
+    def append(self, t, free):
+        capacity = len(self.times)
+        i = (self.start + self.count) % capacity
+        self.times[i] = t
+        self.free[i] = free
+        if self.count < capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % capacity
+
+    def last_time(self):
+        if not self.count:
+            return None
+        return self.times[(self.start + self.count - 1) % len(self.times)]
+
+    def samples(self):
+        capacity = len(self.times)
+        for k in range(self.count):
+            i = (self.start + k) % capacity
+            yield self.times[i], self.free[i]
+
+
+class UsageHistory:
+    """Bounded per-drive usage history persisted to ``HISTORY_FILE``.
+
+    At most one sample per ``INTERVAL`` seconds is kept per drive in a ring of
+    ``CAPACITY`` entries (24 hours by default), so memory and file size stay
+    fixed however long the widget runs. The file is a small binary header
+    followed by each drive's raw arrays.
+    """
+    CAPACITY = 288
+    INTERVAL = 300.0
+    MIN_FIT_SPAN = 600.0
+    MAGIC = b"DWH1"
+    _HEADER = struct.Struct("<4sI")
+    _DRIVE = struct.Struct("<HQII")
+
+    def __init__(self, path=HISTORY_FILE, capacity=CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self.dirty = False
+        self._rings = {}
+        self._eta = {}
+
+    def record(self, drive, free, total, now=None):
+        """Append a sample if the drive's last one is old enough. Returns True if appended."""
+        now = time.time() if now is None else now
+        ring = self._rings.get(drive)
+        if ring is None:
+            ring = self._rings[drive] = UsageRing(self.capacity)
+        last = ring.last_time()
+        if last is not None and now - last < self.INTERVAL:
+            return False
+        ring.append(now, free)
+        ring.total = total
+        self._eta[drive] = self._fit_hours_to_full(ring)
+        self.dirty = True
+        return True
+
+    def series(self, drive):
+        """Used fraction of each stored sample, oldest first."""
+        ring = self._rings.get(drive)
+        if ring is None or not ring.total:
+            return []
+        return [1.0 - free / ring.total for _, free in ring.samples()]
+
+    def hours_to_full(self, drive):
+        return self._eta.get(drive)
+
+    def _fit_hours_to_full(self, ring):
+        # Least-squares slope of free bytes over time
+        points = list(ring.samples())
+        if len(points) < 3 or points[-1][0] - points[0][0] < self.MIN_FIT_SPAN:
+            return None
+        n = len(points)
+        mean_t = sum(t for t, _ in points) / n
+        mean_f = sum(f for _, f in points) / n
+        var = sum((t - mean_t) ** 2 for t, _ in points)
+        if var <= 0:
+            return None
+        slope = sum((t - mean_t) * (f - mean_f) for t, f in points) / var
+        if slope >= 0:
+            return None
+        return points[-1][1] / -slope / 3600.0
+
+    def forget(self, keep):
+        for d in list(self._rings):
+            if d not in keep:
+                del self._rings[d]
+                self._eta.pop(d, None)
+                self.dirty = True
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"History Load Error: {e}", file=sys.stderr)
+            return
+
+        try:
+            magic, capacity = self._HEADER.unpack_from(data, 0)
+            if magic != self.MAGIC:
+                raise ValueError("bad magic")
+            offset = self._HEADER.size
+            rings = {}
+            while offset < len(data):
+                name_len, total, start, count = self._DRIVE.unpack_from(data, offset)
+                offset += self._DRIVE.size
+                drive = data[offset:offset + name_len].decode("utf-8")
+                offset += name_len
+                times = array("d", data[offset:offset + 8 * capacity])
+                offset += 8 * capacity
+                free = array("q", data[offset:offset + 8 * capacity])
+                offset += 8 * capacity
+                if len(times) != capacity or len(free) != capacity or count > capacity:
+                    raise ValueError("truncated")
+
+                ring = UsageRing(self.capacity)
+                ring.total = total
+                for k in range(count):
+                    i = (start + k) % capacity
+                    ring.append(times[i], free[i])
+                rings[drive] = ring
+        except Exception as e:
+            print(f"History Load Error: {e}", file=sys.stderr)
+            return
+
+        self._rings = rings
+        self._eta = {d: self._fit_hours_to_full(r) for d, r in rings.items()}
+
+    def save(self):
+        if not self.dirty:
+            return
+        parts = [self._HEADER.pack(self.MAGIC, self.capacity)]
+        for drive, ring in self._rings.items():
+            name = drive.encode("utf-8")
+            parts.append(self._DRIVE.pack(len(name), ring.total, ring.start, ring.count))
+            parts.append(name)
+            parts.append(ring.times.tobytes())
+            parts.append(ring.free.tobytes())
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class UsageSnapshot:
+    """Last-known usage of every shown drive, persisted to ``SNAPSHOT_FILE``.
+
+    Lets the window paint real numbers at launch, before any drive has been
+    enumerated or stat'ed. Written through ``ConfigStore``, so an unchanged
+    snapshot costs no I/O.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.store = ConfigStore(path)
+        self.drives = []
+        self.usage = {}
+
+    def load(self):
+        data = self.store.load()
+        try:
+            self.drives = [d for d in data.get("drives", []) if isinstance(d, str)]
+            self.usage = {d: DiskUsage(*u) for d, u in data.get("usage", {}).items()}
+        except (TypeError, AttributeError) as e:
+            print(f"Snapshot Load Error: {e}", file=sys.stderr)
+            self.drives, self.usage = [], {}
+
+    def save(self, drives, usage):
+        self.drives = list(drives)
+        self.usage = {d: usage[d] for d in self.drives if d in usage}
+        self.store.save({
+            "drives": self.drives,
+            "usage": {d: [u.total, u.used, u.free, u.percent] for d, u in self.usage.items()},
+        })
+
+
+class DriveProvider:
+    """Backend that lists mounted drives and stats their usage.
+
+    ``partitions`` enumerates mounts and ``system_drives`` picks the ones
+    shown by default. ``usage`` stats one path. Paths for which
+    ``batchable`` is true are local and never hang, so callers may stat them
+    back to back on one thread with ``usage_many``.
+    """
+    name = None
+
+    def partitions(self):
+        raise NotImplementedError
+
+    def system_drives(self, partitions):
+        raise NotImplementedError
+
+    def usage(self, path):
+        raise NotImplementedError
+
+    def batchable(self, path):
+        return False
+
+    def usage_many(self, paths):
+        """``{path: usage, or the exception its stat raised}``."""
+        results = {}
+        for p in paths:
+            try:
+                results[p] = self.usage(p)
+            except Exception as e:
+                results[p] = e
+        return results
+
+
+class PsutilProvider(DriveProvider):
+    """psutil's portable calls: the Windows backend, and the fallback
+    wherever there is no native one. Shows drive letters and UNC shares."""
+    name = "psutil"
+    SYSTEM_PREFIXES = ('A:', 'B:', 'C:', 'D:', 'E:', 'F:', 'G:', 'H:', 'I:', 'J:', 'K:', 'L:', 'M:', 'N:', 'O:', 'P:', 'Q:', 'R:', 'S:', 'T:', 'U:', 'V:', 'W:', 'X:', 'Y:', 'Z:', '//', '\\\\')
+
+    def partitions(self):
+        import psutil
+        return psutil.disk_partitions(all=False)
+
+    def system_drives(self, partitions):
+        return [d.device for d in partitions if 'removable' not in d.opts and d.device.startswith(self.SYSTEM_PREFIXES)]
+
+    def usage(self, path):
+        import psutil
+        return psutil.disk_usage(path)
+
+
+class LinuxProvider(DriveProvider):
+    """Reads ``/proc/self/mountinfo`` itself and stats with ``os.statvfs``.
+
+    Pseudo filesystems are dropped, as are bind mounts of part of a
+    filesystem that is already listed (e.g. files a container runtime mounts
+    over /etc). Drives are mount points. Only filesystems known to be on a
+    local block device are batchable; network, FUSE and anything
+    unrecognised may hang ``statvfs`` and are stat'ed one job each.
+    """
+    name = "linux"
+    MOUNTINFO = "/proc/self/mountinfo"
+    PSEUDO_FS = frozenset((
+        "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs", "devpts",
+        "devtmpfs", "efivarfs", "fuse.gvfsd-fuse", "fuse.lxcfs", "fuse.portal", "fusectl",
+        "hugetlbfs", "mqueue", "nsfs", "proc", "pstore", "ramfs", "rpc_pipefs", "securityfs",
+        "selinuxfs", "squashfs", "sysfs", "tmpfs", "tracefs",
+    ))
+    LOCAL_FS = frozenset((
+        "bcachefs", "btrfs", "exfat", "ext2", "ext3", "ext4", "f2fs", "hfsplus", "jfs",
+        "msdos", "nilfs2", "ntfs", "ntfs3", "overlay", "reiserfs", "vfat", "xfs", "zfs",
+    ))
+    _ESCAPE = re.compile(r"\\([0-7]{3})")
+
+    def __init__(self):
+        self._mounts = {}  # mount point -> Partition, from the last enumeration
+
+    def partitions(self):
+        with open(self.MOUNTINFO, encoding="utf-8", errors="surrogateescape") as f:
+            lines = f.read().splitlines()
+
+        entries = []
+        whole = set()  # devices mounted from their root somewhere
+        for line in lines:
+            # id parent major:minor root mountpoint options [optional...] - fstype source superoptions
+            fields = line.split(" ")
+            try:
+                sep = fields.index("-", 6)
+                dev, root, mountpoint, opts = fields[2], fields[3], fields[4], fields[5]
+                fstype, source = fields[sep + 1], fields[sep + 2]
+            except (ValueError, IndexError):
+                continue
+            if fstype in self.PSEUDO_FS:
+                continue
+            entries.append((dev, root, Partition(self._unescape(source), self._unescape(mountpoint), fstype, opts)))
+            if root == "/":
+                whole.add(dev)
+
+        partitions = [p for dev, root, p in entries if root == "/" or dev not in whole]
+        self._mounts = {p.mountpoint: p for p in partitions}
+        return partitions
+
+    def _unescape(self, field):
+        # mountinfo writes space, tab, newline and backslash as \ooo
+        return self._ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+    def system_drives(self, partitions):
+        return list(dict.fromkeys(p.mountpoint for p in partitions))
+
+    def usage(self, path):
+        st = os.statvfs(path)
+        total = st.f_blocks * st.f_frsize
+        free = st.f_bavail * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        # psutil's definition: percentage of the space available to users
+        percent = round(used / (used + free) * 100, 1) if used + free else 0.0
+        return DiskUsage(total, used, free, percent)
+
+    def batchable(self, path):
+        part = _partition_for(path, self._mounts)
+        return part is not None and part.fstype in self.LOCAL_FS
+
+
+PROVIDERS = {"linux": LinuxProvider, "psutil": PsutilProvider}
+
+
+def default_provider(name=None):
+    """The provider called ``name``, or the native one for this platform."""
+    if name is not None:
+        if name in PROVIDERS:
+            return PROVIDERS[name]()
+        print(f"Unknown drive provider {name!r}, using the default", file=sys.stderr)
+    if sys.platform.startswith("linux") and os.path.exists(LinuxProvider.MOUNTINFO):
+        return LinuxProvider()
+    return PsutilProvider()
+
+
+class MountTable:
+    """Shared index of the system partitions, re-enumerated only on change.
+
+    On Linux the kernel flags ``/proc/self/mountinfo`` with POLLPRI whenever
+    a mount is added or removed, so checking for changes is a single
+    non-blocking ``poll``. Elsewhere a cheap fingerprint is compared (the
+    logical drive bitmask on Windows), falling back to re-enumerating every
+    ``FALLBACK_TTL`` seconds when no fingerprint is available. Enumeration
+    itself is left to a ``DriveProvider``.
+    """
+    MOUNTINFO = "/proc/self/mountinfo"
+    FALLBACK_TTL = 60.0
+
+    def __init__(self, provider=None):
+        self.provider = provider or default_provider()
+        self.partitions = []
+        self.system_drives = []
+        self._system_set = set()
+        self._devices = set()
+        self._valid = False
+        self._stamp = 0.0
+        self._fingerprint = None
+        self._mountinfo = None
+        self._poller = None
+        try:
+            self._mountinfo = open(self.MOUNTINFO, "rb")
+            self._poller = select.poll()
+            self._poller.register(self._mountinfo, select.POLLPRI | select.POLLERR)
+        except (OSError, AttributeError):
+            if self._mountinfo is not None:
+                self._mountinfo.close()
+            self._mountinfo = None
+            self._poller = None
+
+    def _current_fingerprint(self):
+        if sys.platform.startswith('win'):
+            try:
+                import ctypes
+                return ctypes.windll.kernel32.GetLogicalDrives()
+            except Exception:
+                return None
+        return None
+
+    def _changed(self):
+        if self._poller is not None:
+            return bool(self._poller.poll(0))
+        fingerprint = self._current_fingerprint()
+        if fingerprint is not None:
+            changed = fingerprint != self._fingerprint
+            self._fingerprint = fingerprint
+            return changed
+        return time.monotonic() - self._stamp > self.FALLBACK_TTL
+
+    def invalidate(self):
+        self._valid = False
+
+    def refresh(self):
+        """Re-enumerate if the mount table changed. Returns True if it did."""
+        changed = self._changed()
+        if self._valid and not changed:
+            return False
+
+        self.partitions = self.provider.partitions()
+        self.system_drives = self.provider.system_drives(self.partitions)
+        self._system_set = set(self.system_drives)
+        self._devices = {d.device for d in self.partitions} | self._system_set
+        self._valid = True
+        self._stamp = time.monotonic()
+        return True
+
+    def is_system_drive(self, path):
+        return path in self._system_set
+
+    def is_device(self, path):
+        return path in self._devices
+
+
+class PollScheduler:
+    """Adaptive per-drive polling intervals.
+
+    A drive whose free space holds steady backs off towards
+    ``MAX_INTERVAL``; one that is low on space or would fill within
+    ``FAST_FILL_HORIZON`` at its current rate is polled every
+    ``MIN_INTERVAL``. Unreachable drives back off too. In low-power mode no
+    drive is polled more often than ``LOW_POWER_INTERVAL``.
+    """
+    MIN_INTERVAL = 2.0
+    BASE_INTERVAL = 5.0
+    MAX_INTERVAL = 60.0
+    LOW_POWER_INTERVAL = 120.0
+    BACKOFF = 1.5
+    STEADY_BYTES = 1024**2
+    LOW_SPACE_BYTES = 20 * 1024**3
+    FAST_FILL_HORIZON = 3600.0
+
+    def __init__(self):
+        self.low_power = False
+        self._state = {}  # path -> [interval, last sample time, last free bytes]
+
+    def due(self, drives, now=None):
+        now = time.monotonic() if now is None else now
+        due = []
+        for d in drives:
+            state = self._state.get(d)
+            if state is None:
+                due.append(d)
+                continue
+            interval = max(state[0], self.LOW_POWER_INTERVAL) if self.low_power else state[0]
+            if now - state[1] >= interval:
+                due.append(d)
+        return due
+
+    def record(self, drive, free, now=None):
+        now = time.monotonic() if now is None else now
+        state = self._state.get(drive)
+        if state is None or state[2] is None:
+            self._state[drive] = [self.BASE_INTERVAL, now, free]
+            return
+
+        interval, last, last_free = state
+        elapsed = now - last
+        fill_rate = (last_free - free) / elapsed if elapsed > 0 else 0.0
+
+        if free < self.LOW_SPACE_BYTES or (fill_rate > 0 and free / fill_rate < self.FAST_FILL_HORIZON):
+            interval = self.MIN_INTERVAL
+        elif abs(free - last_free) < self.STEADY_BYTES:
+            interval = min(interval * self.BACKOFF, self.MAX_INTERVAL)
+        else:
+            interval = self.BASE_INTERVAL
+        state[:] = [interval, now, free]
+
+    def record_failure(self, drive, now=None):
+        now = time.monotonic() if now is None else now
+        state = self._state.get(drive)
+        if state is None:
+            self._state[drive] = [self.BASE_INTERVAL, now, None]
+        else:
+            state[0] = min(state[0] * 2, self.MAX_INTERVAL)
+            state[1] = now
+
+    def expedite(self):
+        """Make every known drive due on the next check."""
+        for state in self._state.values():
+            state[1] = float("-inf")
+
+    def forget(self, keep):
+        for d in list(self._state):
+            if d not in keep:
+                del self._state[d]
+
+
+def volume_id(path):
+    """Identity of the filesystem holding ``path`` as ``(st_dev, f_fsid)``.
+
+    ``f_fsid`` is 0 where ``os.statvfs`` does not exist; on Windows ``st_dev``
+    is already the volume serial number. Some network and WebDAV shares
+    report serial 0, which tells their volumes apart from nothing: such a
+    path gets an identity of its own and is never taken for an alias.
+    """
+    st_dev = os.stat(path).st_dev
+    if not st_dev:
+        return None, os.path.normcase(os.path.abspath(path))
+    fsid = os.statvfs(path).f_fsid if hasattr(os, "statvfs") else 0
+    return st_dev, fsid
+
+
+class VolumeIndex:
+    """Groups drive paths that live on the same filesystem.
+
+    A custom folder on C:, a share added under two spellings or a bind mount
+    all resolve to one ``volume_id``. Once a path has been identified, only
+    one path per volume needs stat'ing and its result stands for every alias.
+    ``invalidate`` queues every path to be identified again, e.g. after the
+    mount table changed, without breaking up the current groups meanwhile.
+    """
+
+    def __init__(self):
+        self._ids = {}       # path -> volume id
+        self._members = {}   # volume id -> paths, in identification order
+        self._unverified = set()
+
+    def needs_identity(self, path):
+        return path not in self._ids or path in self._unverified
+
+    def identify(self, path, vid):
+        """Record ``path``'s volume. Returns True if any grouping changed."""
+        self._unverified.discard(path)
+        old = self._ids.get(path)
+        if old == vid:
+            return False
+        if old is not None:
+            self._drop(path, old)
+        self._ids[path] = vid
+        members = self._members.setdefault(vid, [])
+        members.append(path)
+        return old is not None or len(members) > 1
+
+    def _drop(self, path, vid):
+        members = self._members[vid]
+        members.remove(path)
+        if not members:
+            del self._members[vid]
+
+    def aliases(self, path):
+        """Every known path on ``path``'s volume, ``path`` included."""
+        vid = self._ids.get(path)
+        return list(self._members[vid]) if vid is not None else [path]
+
+    def groups(self, drives):
+        """``drives`` split into one list per volume, in order of first appearance."""
+        groups = {}
+        for d in drives:
+            groups.setdefault(self._ids.get(d, d), []).append(d)
+        return list(groups.values())
+
+    def representatives(self, drives):
+        """The paths to actually stat for ``drives``: one per volume, plus any
+        path that still has to be identified."""
+        seen = set()
+        reps = []
+        for d in drives:
+            vid = self._ids.get(d)
+            if vid is None or d in self._unverified:
+                reps.append(d)
+            elif vid not in seen:
+                seen.add(vid)
+                reps.append(d)
+        return reps
+
+    def invalidate(self):
+        self._unverified = set(self._ids)
+
+    def forget(self, keep):
+        for d in list(self._ids):
+            if d not in keep:
+                self._drop(d, self._ids.pop(d))
+                self._unverified.discard(d)
+
+
+class DiskIOMonitor:
+    """Read/write throughput and IOPS of the disk behind each drive.
+
+    ``poll`` makes one ``psutil.disk_io_counters(perdisk=True)`` call and
+    updates an exponentially smoothed rate per physical disk, so its cost
+    follows the number of disks, not drives. ``map_drives`` ties each drive
+    to the disk holding its partition; network shares have none.
+    """
+    SMOOTHING = 0.3  # weight of the newest delta
+
+    def __init__(self):
+        self.rates = {}        # disk -> IORates
+        self._disk_of = {}     # drive -> disk
+        self._drives_on = {}   # disk -> [drives]
+        self._last = {}        # disk -> (time, (read bytes, write bytes, ops))
+        self._device_disk = {}  # partition device -> disk, or None
+
+    def map_drives(self, drives, partitions):
+        self._disk_of = {}
+        self._drives_on = {}
+        mounts = {os.path.normcase(p.mountpoint): p for p in partitions}
+        for d in drives:
+            part = _partition_for(d, mounts)
+            if part is None:
+                continue
+            if part.device not in self._device_disk:
+                self._device_disk[part.device] = _disk_for_device(part.device)
+            disk = self._device_disk[part.device]
+            if disk is not None:
+                self._disk_of[d] = disk
+                self._drives_on.setdefault(disk, []).append(d)
+        for disk in list(self._last):
+            if disk not in self._drives_on:
+                del self._last[disk]
+                self.rates.pop(disk, None)
+
+    def rates_for(self, drive):
+        return self.rates.get(self._disk_of.get(drive))
+
+    def drives_on(self, disk):
+        return self._drives_on.get(disk, [])
+
+    def poll(self, now=None):
+        """Take one counter reading. Returns the disks whose rates changed."""
+        if not self._drives_on:
+            return []
+        import psutil
+        now = time.monotonic() if now is None else now
+        try:
+            counters = psutil.disk_io_counters(perdisk=True) or {}
+        except Exception as e:  # e.g. no disk stats in a container
+            print(f"Disk I/O Error: {e}", file=sys.stderr)
+            self._drives_on = {}
+            return []
+
+        changed = []
+        for disk in self._drives_on:
+            c = counters.get(disk)
+            if c is None:
+                continue
+            sample = (c.read_bytes, c.write_bytes, c.read_count + c.write_count)
+            last = self._last.get(disk)
+            self._last[disk] = (now, sample)
+            if last is None:
+                continue
+            elapsed = now - last[0]
+            deltas = [b - a for a, b in zip(last[1], sample)]
+            if elapsed <= 0 or min(deltas) < 0:
+                continue  # counters were reset or wrapped
+            fresh = IORates(*(delta / elapsed for delta in deltas))
+            old = self.rates.get(disk)
+            rates = fresh if old is None else IORates(*(o + self.SMOOTHING * (f - o) for o, f in zip(old, fresh)))
+            if rates != old:
+                self.rates[disk] = rates
+                changed.append(disk)
+        return changed
+
+
+def _partition_for(path, mounts):
+    # Walk up from ``path`` to the nearest mount point, i.e. the longest one
+    # containing it; ``mounts`` is keyed by normcase'd mount point
+    path = os.path.normcase(path)
+    while True:
+        part = mounts.get(path)
+        if part is not None:
+            return part
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _disk_for_device(device):
+    """psutil's per-disk counter key for a partition device, if it has one."""
+    if sys.platform.startswith('win'):
+        return _windows_physical_disk(device)
+    if device.startswith("/dev/"):
+        # Resolves /dev/mapper/* and /dev/disk/by-* links to the kernel name
+        return os.path.basename(os.path.realpath(device))
+    return None
+
+
+def _windows_physical_disk(device):
+    # IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS; volumes spanning several disks
+    # fail with ERROR_MORE_DATA and simply get no I/O figures
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class DISK_EXTENT(ctypes.Structure):
+            _fields_ = [("DiskNumber", wintypes.DWORD), ("StartingOffset", ctypes.c_longlong),
+                        ("ExtentLength", ctypes.c_longlong)]
+
+        class VOLUME_DISK_EXTENTS(ctypes.Structure):
+            _fields_ = [("NumberOfDiskExtents", wintypes.DWORD), ("Extents", DISK_EXTENT * 1)]
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateFileW.restype = wintypes.HANDLE
+        handle = kernel32.CreateFileW("\\\\.\\" + device.rstrip("\\"), 0, 3, None, 3, 0, None)
+        if handle is None or handle == wintypes.HANDLE(-1).value:
+            return None
+        try:
+            extents = VOLUME_DISK_EXTENTS()
+            returned = wintypes.DWORD()
+            if not kernel32.DeviceIoControl(wintypes.HANDLE(handle), 0x00560000, None, 0,
+                                            ctypes.byref(extents), ctypes.sizeof(extents),
+                                            ctypes.byref(returned), None):
+                return None
+            return f"PhysicalDrive{extents.Extents[0].DiskNumber}"
+        finally:
+            kernel32.CloseHandle(wintypes.HANDLE(handle))
+    except Exception:
+        return None
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout."""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, nbuckets):
+        self.counts = [0] * nbuckets
+        self.sum = 0.0
+        self.count = 0
+
+    def quantile(self, q, bounds):
+        """Upper bucket bound containing the ``q`` quantile, or None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Thread-safe timing histograms and error counters.
+
+    Only created when metrics are switched on; call sites hold ``None``
+    otherwise, so the disabled cost is a single attribute test.
+    """
+    PREFIX = "drivewidget_"
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    HELP = {
+        "tick_seconds": ("histogram", "Time spent in each DriveCollector poll tick on the GUI thread: "
+                                      "sample dispatch, I/O poll and alert pass, plus any refresh."),
+        "refresh_seconds": ("histogram", "Time spent in DriveCollector.refresh_drives on the GUI thread, "
+                                         "which runs only when mounts or the drive list change."),
+        "disk_usage_seconds": ("histogram", "Duration of each usage stat (disk_usage or statvfs), per drive."),
+        "io_poll_seconds": ("histogram", "Duration of the one batched psutil.disk_io_counters call per tick."),
+        "panel_render_seconds": ("histogram", "Time to render the cached panel background and shadow, once per window size."),
+        "stat_errors_total": ("counter", "disk_usage calls that raised, per drive and exception type."),
+        "stat_timeouts_total": ("counter", "disk_usage calls still running past the sampler timeout, per drive."),
+        "swallowed_errors_total": ("counter", "Exceptions caught and logged instead of raised, per site."),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}    # (name, labels) -> count
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        i = 0
+        for bound in self.BUCKETS:
+            if seconds <= bound:
+                break
+            i += 1
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(len(self.BUCKETS) + 1)
+            hist.counts[i] += 1
+            hist.sum += seconds
+            hist.count += 1
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def merged(self, name):
+        """One histogram summing every label set of ``name``."""
+        total = Histogram(len(self.BUCKETS) + 1)
+        with self._lock:
+            for (n, _), hist in self._histograms.items():
+                if n == name:
+                    total.counts = [a + b for a, b in zip(total.counts, hist.counts)]
+                    total.sum += hist.sum
+                    total.count += hist.count
+        return total
+
+    def slowest(self, name, label, limit=3):
+        """``[(label value, mean seconds)]`` for the slowest label sets of ``name``."""
+        with self._lock:
+            means = [(dict(labels).get(label), hist.sum / hist.count)
+                     for (n, labels), hist in self._histograms.items() if n == name and hist.count]
+        return sorted(means, key=lambda m: m[1], reverse=True)[:limit]
+
+    def quantile(self, name, q):
+        return self.merged(name).quantile(q, self.BUCKETS + (float("inf"),))
+
+    def counter_total(self, name):
+        with self._lock:
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+                   for k, v in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def render(self):
+        """Current values in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        bounds = [str(b) for b in self.BUCKETS] + ["+Inf"]
+        for name, (kind, text) in self.HELP.items():
+            full = self.PREFIX + name
+            lines.append(f"# HELP {full} {text}")
+            lines.append(f"# TYPE {full} {kind}")
+            if kind == "histogram":
+                for (n, labels), (counts, total, count) in histograms.items():
+                    if n != name:
+                        continue
+                    seen = 0
+                    for bound, c in zip(bounds, counts):
+                        seen += c
+                        lines.append(f"{full}_bucket{self._labels(labels, [('le', bound)])} {seen}")
+                    lines.append(f"{full}_sum{self._labels(labels)} {total}")
+                    lines.append(f"{full}_count{self._labels(labels)} {count}")
+            else:
+                for (n, labels), value in counters.items():
+                    if n == name:
+                        lines.append(f"{full}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves ``Metrics.render()`` at ``/metrics`` on a local daemon thread."""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?", 1)[0] != "/metrics":
+                    handler.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ScanResult:
+    """Snapshot of a SpaceScanner run, partial until ``complete`` is set."""
+    __slots__ = ("root", "total", "children", "largest_files", "dirs_scanned", "dirs_reused",
+                 "errors", "elapsed", "complete")
+
+    def __init__(self, root):
+        self.root = root
+        self.total = 0
+        self.children = []       # [(bytes, path)] immediate subfolders, largest first
+        self.largest_files = []  # [(bytes, path)] largest first
+        self.dirs_scanned = 0
+        self.dirs_reused = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.complete = False
+
+
+class SpaceScanner:
+    """Parallel, cancellable "what's using the space" walker.
+
+    Directories are listed with ``os.scandir`` on a pool of daemon threads.
+    Each directory's subfolders and file names are cached against its
+    mtime, so a rescan re-lists only directories whose entries changed.
+    File sizes are always stat'ed again, since a file growing in place does
+    not touch its directory's mtime. The cache holds at most
+    ``MAX_CACHED_NAMES`` names and drops the least recently scanned
+    directories first. Only files of at least ``MIN_FILE_BYTES`` are
+    reported, at most ``FILES_PER_DIR`` per directory and ``MAX_FILES`` per
+    result. The walk stays on the root's filesystem and does not follow
+    symlinks.
+    """
+    WORKERS = 8
+    MAX_FILES = 20
+    FILES_PER_DIR = 20
+    MIN_FILE_BYTES = 1024**2
+    MAX_CACHED_NAMES = 500000
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, workers=WORKERS):
+        self.workers = workers
+        self._cache = OrderedDict()  # dir -> (mtime_ns, [subdirs], (file names)), oldest first
+        self._cached_names = 0
+        self._cache_lock = threading.Lock()
+
+    def _add_file(self, big, size, name):
+        if size >= self.MIN_FILE_BYTES:
+            if len(big) < self.FILES_PER_DIR:
+                heapq.heappush(big, (size, name))
+            else:
+                heapq.heappushpop(big, (size, name))
+
+    def _remember(self, path, entry):
+        cost = 1 + len(entry[1]) + len(entry[2])
+        with self._cache_lock:
+            old = self._cache.pop(path, None)
+            if old is not None:
+                self._cached_names -= 1 + len(old[1]) + len(old[2])
+            if cost > self.MAX_CACHED_NAMES:
+                return
+            self._cache[path] = entry
+            self._cached_names += cost
+            while self._cached_names > self.MAX_CACHED_NAMES:
+                _, old = self._cache.popitem(last=False)
+                self._cached_names -= 1 + len(old[1]) + len(old[2])
+
+    def _list_dir(self, path, root_dev):
+        """``((file bytes, [subdirs], [(bytes, name)]), reused)`` for ``path``."""
+        st = os.stat(path, follow_symlinks=False)
+        with self._cache_lock:
+            cached = self._cache.get(path)
+            if cached is not None:
+                if cached[0] == st.st_mtime_ns:
+                    self._cache.move_to_end(path)
+                else:
+                    cached = None
+
+        file_bytes = 0
+        big = []
+        if cached is not None:
+            _, subdirs, names = cached
+            for name in names:
+                try:
+                    size = os.stat(os.path.join(path, name), follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                file_bytes += size
+                self._add_file(big, size, name)
+            return (file_bytes, subdirs, big), True
+
+        subdirs = []
+        names = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # DirEntry.stat() reports st_dev 0 on Windows; only
+                        # a real, different device marks a mount point
+                        dev = entry.stat(follow_symlinks=False).st_dev
+                        if not dev or dev == root_dev:
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        size = entry.stat(follow_symlinks=False).st_size
+                        names.append(entry.name)
+                        file_bytes += size
+                        self._add_file(big, size, entry.name)
+                except OSError:
+                    continue
+
+        self._remember(path, (st.st_mtime_ns, subdirs, tuple(names)))
+        return (file_bytes, subdirs, big), False
+
+    def scan(self, root, on_progress=None, cancel=None):
+        """Walk ``root`` and return a ScanResult.
+
+        Blocks until done or ``cancel`` (a threading.Event) is set, calling
+        ``on_progress(partial ScanResult)`` from this thread as results come in.
+        """
+        cancel = cancel or threading.Event()
+        start = time.monotonic()
+        root = os.path.abspath(root)
+        root_dev = os.stat(root).st_dev
+
+        jobs = queue.SimpleQueue()
+        lock = threading.Lock()
+        outstanding = [1]
+        done = threading.Event()
+        own_bytes = {}     # dir -> own file bytes
+        children_of = {}   # dir -> [subdirs]
+        branch_bytes = {}  # immediate child of root (or root) -> bytes so far
+        files = []         # min-heap of (bytes, path), at most MAX_FILES
+        counts = {"scanned": 0, "reused": 0, "errors": 0}
+
+        def worker():
+            while not done.is_set():
+                try:
+                    path, branch = jobs.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                try:
+                    if not cancel.is_set():
+                        try:
+                            (file_bytes, subdirs, big), reused = self._list_dir(path, root_dev)
+                        except OSError:
+                            with lock:
+                                counts["errors"] += 1
+                        else:
+                            with lock:
+                                own_bytes[path] = file_bytes
+                                children_of[path] = subdirs
+                                branch_bytes[branch] = branch_bytes.get(branch, 0) + file_bytes
+                                counts["reused" if reused else "scanned"] += 1
+                                for size, name in big:
+                                    item = (size, os.path.join(path, name))
+                                    if len(files) < self.MAX_FILES:
+                                        heapq.heappush(files, item)
+                                    elif item > files[0]:
+                                        heapq.heapreplace(files, item)
+                                outstanding[0] += len(subdirs)
+                            for sub in subdirs:
+                                jobs.put((sub, sub if path == root else branch))
+                finally:
+                    with lock:
+                        outstanding[0] -= 1
+                        if outstanding[0] == 0:
+                            done.set()
+
+        def snapshot(complete):
+            result = ScanResult(root)
+            with lock:
+                if complete:
+                    result.children = self._rollup(root, own_bytes, children_of)
+                else:
+                    result.children = [(b, p) for p, b in branch_bytes.items() if p != root]
+                result.total = sum(branch_bytes.values())
+                result.largest_files = sorted(files, reverse=True)
+                result.dirs_scanned = counts["scanned"]
+                result.dirs_reused = counts["reused"]
+                result.errors = counts["errors"]
+            result.children.sort(reverse=True)
+            result.elapsed = time.monotonic() - start
+            result.complete = complete and not cancel.is_set()
+            return result
+
+        jobs.put((root, root))
+        for _ in range(self.workers):
+            threading.Thread(target=worker, name="space-scan", daemon=True).start()
+
+        while not done.wait(self.PROGRESS_INTERVAL):
+            if cancel.is_set():
+                break
+            if on_progress is not None:
+                on_progress(snapshot(False))
+        done.set()
+        return snapshot(True)
+
+    @staticmethod
+    def _rollup(root, own_bytes, children_of):
+        """``[(recursive bytes, path)]`` for each immediate child of ``root``."""
+        totals = {}
+        stack = [(root, False)]
+        while stack:
+            path, expanded = stack.pop()
+            if expanded:
+                totals[path] = own_bytes.get(path, 0) + sum(totals.get(c, 0) for c in children_of.get(path, ()))
+            else:
+                stack.append((path, True))
+                stack.extend((c, False) for c in children_of.get(path, ()))
+        return [(totals.get(c, 0), c) for c in children_of.get(root, ())]
+
+
+class AlertRule:
+    """One alert rule from the ``"alerts"`` list in ``CONFIG_FILE``.
+
+    Keys: ``name``, ``drives`` (glob or list of globs, default ``"*"``),
+    ``free_below_gb``, ``free_below_percent``, ``fills_within_hours``
+    (any one met fires the rule), ``hysteresis`` (fraction the value must
+    recover past the threshold before the rule clears, default 0.1),
+    ``notify`` (default true) and ``command`` (overrides ``alert_command``).
+    """
+
+    def __init__(self, data):
+        self.name = str(data.get("name", "alert"))
+        patterns = data.get("drives", "*")
+        self.patterns = [patterns] if isinstance(patterns, str) else list(patterns)
+        gb = data.get("free_below_gb")
+        self.free_below = None if gb is None else float(gb) * 1024**3
+        pct = data.get("free_below_percent")
+        self.free_below_percent = None if pct is None else float(pct)
+        hours = data.get("fills_within_hours")
+        self.fills_within_hours = None if hours is None else float(hours)
+        self.hysteresis = float(data.get("hysteresis", 0.1))
+        self.notify = bool(data.get("notify", True))
+        self.command = data.get("command")
+        if self.free_below is None and self.free_below_percent is None and self.fills_within_hours is None:
+            raise ValueError(f"alert rule {self.name!r} has no threshold")
+
+    def matches(self, drive):
+        return any(fnmatch.fnmatch(drive, p) for p in self.patterns)
+
+    def breached(self, free, total, hours_to_full, active):
+        # An active rule has to recover past threshold * (1 + hysteresis) to clear
+        factor = 1.0 + self.hysteresis if active else 1.0
+        if self.free_below is not None and free < self.free_below * factor:
+            return True
+        if self.free_below_percent is not None and total and free / total * 100 < self.free_below_percent * factor:
+            return True
+        if self.fills_within_hours is not None and hours_to_full is not None and hours_to_full < self.fills_within_hours * factor:
+            return True
+        return False
+
+
+class AlertEvent:
+    __slots__ = ("rule", "drive", "firing", "free", "total")
+
+    def __init__(self, rule, drive, firing, free, total):
+        self.rule = rule
+        self.drive = drive
+        self.firing = firing
+        self.free = free
+        self.total = total
+
+    def message(self):
+        state = "needs attention" if self.firing else "recovered"
+        return f"{self.drive} {state} ({self.rule.name}): {format_bytes(self.free)} free of {format_bytes(self.total)}"
+
+
+class AlertEngine:
+    """Evaluates every rule against a tick's samples in one pass.
+
+    Keeps which (rule, drive) pairs are firing and returns only
+    transitions, so a drive sitting past a threshold produces one event.
+    """
+    DEFAULT_RULES = [{"name": "Low space", "free_below_gb": 20, "hysteresis": 0, "notify": False}]
+
+    def __init__(self, rules_data=None):
+        self.rules = []
+        for data in (self.DEFAULT_RULES if rules_data is None else rules_data):
+            try:
+                self.rules.append(AlertRule(data))
+            except (TypeError, ValueError, AttributeError) as e:
+                print(f"Alert Rule Error: {e}", file=sys.stderr)
+        self._active = set()    # (rule, drive); rules compare by identity, names may repeat
+        self._firing = {}       # drive -> number of firing rules
+        self._rules_for = {}    # drive -> matching rules
+
+    def is_firing(self, drive):
+        return self._firing.get(drive, 0) > 0
+
+    def evaluate(self, samples, hours_to_full=lambda drive: None):
+        """``samples`` is an iterable of ``(drive, free, total)``. Returns the AlertEvents."""
+        events = []
+        for drive, free, total in samples:
+            rules = self._rules_for.get(drive)
+            if rules is None:
+                rules = self._rules_for[drive] = [r for r in self.rules if r.matches(drive)]
+            hours = hours_to_full(drive) if any(r.fills_within_hours is not None for r in rules) else None
+            for rule in rules:
+                key = (rule, drive)
+                active = key in self._active
+                if rule.breached(free, total, hours, active) != active:
+                    if active:
+                        self._active.discard(key)
+                        self._firing[drive] -= 1
+                    else:
+                        self._active.add(key)
+                        self._firing[drive] = self._firing.get(drive, 0) + 1
+                    events.append(AlertEvent(rule, drive, not active, free, total))
+        return events
+
+    def forget(self, keep):
+        for key in [k for k in self._active if k[1] not in keep]:
+            self._active.discard(key)
+        for drive in [d for d in self._rules_for if d not in keep]:
+            del self._rules_for[drive]
+            self._firing.pop(drive, None)
+
+
+class NotificationLimiter:
+    """Deduplicates and rate-limits alert notifications.
+
+    A (rule, drive) pair is announced at most once per ``COOLDOWN`` seconds,
+    recovered or not in between, and its recovery only if that alert was
+    announced. No more than ``BURST`` messages go out per ``WINDOW``;
+    anything over the budget is folded into a single summary message.
+    """
+    COOLDOWN = 3600.0
+    BURST = 3
+    WINDOW = 60.0
+
+    def __init__(self):
+        self._last_sent = {}     # (rule, drive) -> time its alert was last announced
+        self._announced = set()  # (rule, drive) announced as firing, not yet as recovered
+        self._sent_times = []
+        self._backlog = {}    # (rule, drive) -> AlertEvent held back by the rate limit
+
+    def filter(self, events, now=None):
+        """Returns ``(events to deliver, summary text or None)``.
+
+        Call every tick, even with no events: alerts held back by the rate
+        limit are delivered from a backlog once the budget allows.
+        """
+        now = time.monotonic() if now is None else now
+        for event in events:
+            if not event.rule.notify:
+                continue
+            key = (event.rule, event.drive)
+            if self._backlog.pop(key, None) is not None:
+                continue  # undoes a transition that has not gone out yet
+            if event.firing:
+                last = self._last_sent.get(key)
+                if last is not None and now - last < self.COOLDOWN:
+                    continue  # and so will its recovery be
+                self._backlog[key] = event
+            elif key in self._announced:
+                self._backlog[key] = event
+
+        if not self._backlog:
+            return [], None
+        self._sent_times = [t for t in self._sent_times if now - t < self.WINDOW]
+        budget = self.BURST - len(self._sent_times)
+        if budget <= 0:
+            return [], None
+
+        pending = list(self._backlog.values())
+        self._backlog.clear()
+        if len(pending) > budget:
+            # Keep one slot for the summary
+            deliver, folded = pending[:budget - 1], pending[budget - 1:]
+        else:
+            deliver, folded = pending, []
+
+        for event in deliver + folded:
+            key = (event.rule, event.drive)
+            if event.firing:
+                self._last_sent[key] = now
+                self._announced.add(key)
+            else:
+                self._announced.discard(key)
+        self._sent_times.extend([now] * (len(deliver) + (1 if folded else 0)))
+
+        summary = None
+        if folded:
+            drives = ", ".join(e.drive for e in folded[:3]) + (", …" if len(folded) > 3 else "")
+            summary = f"{len(folded)} more drive alerts: {drives}"
+        return deliver, summary
+
+
+def run_alert_command(command, event):
+    """Start the user's alert hook without waiting for it.
+
+    The event is passed in ``DRIVE_ALERT_*`` environment variables.
+    """
+    import subprocess
+    env = dict(os.environ,
+               DRIVE_ALERT_DRIVE=event.drive,
+               DRIVE_ALERT_RULE=event.rule.name,
+               DRIVE_ALERT_STATE="firing" if event.firing else "resolved",
+               DRIVE_ALERT_FREE_BYTES=str(event.free),
+               DRIVE_ALERT_TOTAL_BYTES=str(event.total),
+               DRIVE_ALERT_MESSAGE=event.message())
+    try:
+        subprocess.Popen(command, shell=True, env=env)
+    except OSError as e:
+        print(f"Alert Command Error: {e}", file=sys.stderr)
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def format_rates(rates):
+    mb = 1024**2
+    return f"R {rates.read_bps / mb:.1f} · W {rates.write_bps / mb:.1f} MB/s · {rates.iops:.0f} IOPS"
+
+
+def default_name(drive):
+    mapped_icon = "🌐 " if drive.startswith("\\\\") or drive.startswith("//") else "💾 "
+    return mapped_icon + drive
+
+
+def resolve_drives(custom_drives, mounts):
+    """Merge custom and system drives into display order.
+
+    Returns ``(final_drives, custom_drives)``: custom drives first in their
+    saved order, then system drives, with C: pinned to the top on Windows.
+    ``custom_drives`` is the input minus anything that is now a system drive.
+    """
+    # Ordered de-duplication: custom drives first, then system drives
+    final_drives = list(dict.fromkeys(custom_drives + mounts.system_drives))
+
+    if sys.platform.startswith('win'):
+        c_drive = next((drive for drive in final_drives if drive.lower().startswith('c:')), None)
+        if c_drive and final_drives.index(c_drive) != 0:
+            final_drives.remove(c_drive)
+            final_drives.insert(0, c_drive)
+
+    return final_drives, [d for d in final_drives if not mounts.is_system_drive(d)]
+
+
+def sample_usage(drives, timeout=2.0, inflight=None, provider=None):
+    """Stat ``drives`` concurrently, giving up on each after ``timeout`` seconds.
+
+    Returns ``{drive: usage or None}``; None means the stat failed or is still
+    hanging. Each stat that could hang runs on its own daemon thread so a
+    dead share can neither block the others nor keep the process alive; the
+    provider's batchable (local) drives share one. If that one overruns,
+    the drives it has not reached yet are released for the next call. Pass
+    the same ``inflight`` set across calls to avoid piling threads onto a
+    hung path.
+    """
+    provider = provider or PsutilProvider()
+    inflight = set() if inflight is None else inflight
+    results = {}
+    threads = []
+    lock = threading.Lock()
+
+    def stat(batch):
+        while True:
+            with lock:
+                if not batch:
+                    return
+                drive = batch.pop(0)
+            usage = provider.usage_many([drive])[drive]
+            results[drive] = None if isinstance(usage, Exception) else usage
+            inflight.discard(drive)
+
+    todo = [d for d in drives if d not in inflight]
+    inflight.update(todo)
+    local = [d for d in todo if provider.batchable(d)]
+    batches = ([local] if local else []) + [[d] for d in todo if not provider.batchable(d)]
+    for batch in batches:
+        t = threading.Thread(target=stat, args=(batch,), name="drive-stat", daemon=True)
+        t.start()
+        threads.append(t)
+
+    deadline = time.monotonic() + timeout
+    for t in threads:
+        t.join(max(0.0, deadline - time.monotonic()))
+
+    with lock:
+        for batch in batches:
+            inflight.difference_update(batch)
+            batch.clear()
+    return {d: results.get(d) for d in drives}
+
+
+def parse_address(address):
+    """``"unix:/path"``, ``"host:port"`` or ``"host"`` to ``("unix", path)`` or
+    ``("tcp", (host, port))``; the port defaults to ``AGENT_PORT``. IPv6
+    addresses with a port go in brackets, e.g. ``"[::1]:9470"``."""
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    host, sep, port = address.rpartition(":")
+    if not sep or "]" in port or (":" in host and not host.startswith("[")):
+        host, port = address, AGENT_PORT
+    return "tcp", (host.strip("[]"), int(port))
+
+
+class DeltaEncoder:
+    """Turns successive ``{drive: usage or None}`` tables into agent batches.
+
+    A batch carries only the drives whose values changed, and of those only
+    the changed fields; ``None`` marks a drive unreachable and ``removed``
+    lists drives that went away. ``full`` is the whole table, sent to each
+    newly connected client before it joins the delta stream.
+    """
+    FIELDS = ("total", "used", "free", "percent")
+
+    def __init__(self):
+        self.seq = 0
+        self._sent = {}  # drive -> {field: value} or None
+
+    def delta(self, table):
+        """The batch moving clients from the last table to ``table``, or None."""
+        changes = {}
+        for d, usage in table.items():
+            old = self._sent.get(d, ())
+            if usage is None:
+                if old is not None:
+                    changes[d] = None
+                    self._sent[d] = None
+                continue
+            values = dict(zip(self.FIELDS, (usage.total, usage.used, usage.free, usage.percent)))
+            diff = values if not old else {k: v for k, v in values.items() if old[k] != v}
+            if diff:
+                changes[d] = diff
+                self._sent[d] = values
+        removed = [d for d in self._sent if d not in table]
+        for d in removed:
+            del self._sent[d]
+        if not changes and not removed:
+            return None
+        self.seq += 1
+        return {"type": "batch", "seq": self.seq, "drives": changes, "removed": removed}
+
+    def full(self):
+        return {"type": "batch", "seq": self.seq, "full": True, "drives": dict(self._sent), "removed": []}
+
+
+class DeltaDecoder:
+    """Client-side mirror of one agent's drive table.
+
+    ``feed`` applies one decoded message and returns ``(changed, removed)``:
+    the drives whose usage changed, as ``{drive: DiskUsage or None}``, and
+    the drives that disappeared. A gap in ``seq`` raises ValueError; the
+    caller should reconnect, which starts over with a full table.
+    """
+
+    def __init__(self):
+        self.table = {}
+        self.host = None
+        self.seq = None
+
+    def reset(self):
+        """Forget the stream position, e.g. after a reconnect; the table is kept
+        so the next full batch can report what was removed meanwhile."""
+        self.seq = None
+
+    def feed(self, message):
+        kind = message.get("type")
+        if kind == "hello":
+            if message.get("version") != PROTOCOL_VERSION:
+                raise ValueError(f"unsupported protocol version {message.get('version')!r}")
+            self.host = message.get("host")
+            return {}, []
+        if kind != "batch":
+            return {}, []
+
+        seq = message["seq"]
+        full = message.get("full", False)
+        if not full and (self.seq is None or seq != self.seq + 1):
+            raise ValueError(f"batch {seq} out of sequence after {self.seq}")
+        self.seq = seq
+
+        drives = message.get("drives", {})
+        removed = [d for d in self.table if d not in drives] if full else list(message.get("removed", []))
+        for d in removed:
+            self.table.pop(d, None)
+
+        changed = {}
+        for d, values in drives.items():
+            old = self.table.get(d)
+            if values is None:
+                usage = None
+            else:
+                fields = old._asdict() if old is not None else {}
+                fields.update(values)
+                try:
+                    usage = DiskUsage(**fields)
+                except TypeError:
+                    raise ValueError(f"incomplete update for {d!r}")
+            self.table[d] = changed[d] = usage
+        return changed, removed
+
+
+class DriveAgent:
+    """Serves this host's drive usage to remote widgets as JSON lines.
+
+    One sampling loop feeds every client: each new connection gets a hello
+    and the full table, then one delta batch per tick in which anything
+    changed. A client that cannot keep up or has gone away is dropped at the
+    next send; it reconnects and starts again from a full table.
+    """
+    SEND_TIMEOUT = 5.0
+
+    def __init__(self, address, provider=None, config=CONFIG_FILE, interval=5.0, timeout=2.0):
+        import socket
+        self.interval = interval
+        self.timeout = timeout
+        self.config = config
+        self.provider = provider or default_provider()
+        self.mounts = MountTable(self.provider)
+        self.encoder = DeltaEncoder()
+        self.hostname = socket.gethostname()
+        self._clients = []
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self._stop = threading.Event()
+
+        kind, target = parse_address(address)
+        if kind == "unix":
+            self._remove_stale_socket(target)
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET6 if ":" in target[0] else socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(target)
+        self.sock.listen()
+        self.address = target if kind == "unix" else self.sock.getsockname()[:2]
+
+    @staticmethod
+    def _remove_stale_socket(path):
+        """Unlink ``path`` if it is a Unix socket left behind by an agent that
+        did not exit cleanly. Anything else there raises OSError: a file that
+        is not a socket, or a socket some process still listens on."""
+        import socket, stat
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(errno.EEXIST, "exists and is not a socket", path)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+        finally:
+            probe.close()
+        raise OSError(errno.EADDRINUSE, "another agent is listening on it", path)
+
+    @staticmethod
+    def _line(message):
+        return (json.dumps(message, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+    def tick(self):
+        """Sample once and send the resulting delta to every client."""
+        data = ConfigStore(self.config).load()
+        self.mounts.refresh()
+        final_drives, _ = resolve_drives(data.get("drives", []), self.mounts)
+        table = sample_usage(final_drives, self.timeout, self._inflight, self.provider)
+        with self._lock:
+            batch = self.encoder.delta(table)
+            if batch is not None:
+                line = self._line(batch)
+                for conn in list(self._clients):
+                    self._send(conn, line)
+
+    def _send(self, conn, line):
+        try:
+            conn.sendall(line)
+        except OSError:
+            self._clients.remove(conn)
+            conn.close()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.settimeout(self.SEND_TIMEOUT)
+            with self._lock:
+                self._clients.append(conn)
+                self._send(conn, self._line({"type": "hello", "version": PROTOCOL_VERSION, "host": self.hostname})
+                           + self._line(self.encoder.full()))
+
+    def serve_forever(self):
+        threading.Thread(target=self._accept_loop, name="agent-accept", daemon=True).start()
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self.sock.close()
+        with self._lock:
+            for conn in self._clients:
+                conn.close()
+            self._clients = []
+
+
+def run_agent(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="DriveWidget.py --agent",
+                                     description="Serve this host's drive usage to remote widgets.")
+    parser.add_argument("--agent", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--listen", default=f"127.0.0.1:{AGENT_PORT}",
+                        help="host:port, or unix:/path for a Unix socket")
+    parser.add_argument("--config", default=CONFIG_FILE, help="settings file listing extra drives")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between samples")
+    parser.add_argument("--timeout", type=float, default=2.0, help="per-drive stat timeout in seconds")
+    args = parser.parse_args(argv)
+
+    provider = default_provider(ConfigStore(args.config).load().get("provider"))
+    try:
+        agent = DriveAgent(args.listen, provider, args.config, args.interval, args.timeout)
+    except OSError as e:
+        print(f"Agent Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Serving drive usage on {args.listen}", file=sys.stderr, flush=True)
+    try:
+        agent.serve_forever()
+    finally:
+        agent.stop()
+    return 0
+
+
+def process_uptime_ms():
+    """Milliseconds since this process was created, interpreter startup included."""
+    try:
+        # Clock-tick precision; psutil's create_time is anchored to a boot
+        # time that Linux only reports to the second
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return (time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000.0
+    except (OSError, AttributeError, ValueError, IndexError):
+        import psutil
+        return (time.time() - psutil.Process().create_time()) * 1000.0
+
+
+def run_headless(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="DriveWidget.py --headless",
+                                     description="Print drive usage as JSON lines without starting the GUI.")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--config", default=CONFIG_FILE, help="settings file shared with the widget")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="keep streaming every N seconds instead of sampling once")
+    parser.add_argument("--timeout", type=float, default=2.0, help="per-drive stat timeout in seconds")
+    parser.add_argument("--timing", action="store_true", help="report startup time on stderr")
+    args = parser.parse_args(argv)
+
+    data = ConfigStore(args.config).load()
+    custom_names = data.get("names", {})
+    provider = default_provider(data.get("provider"))
+    mounts = MountTable(provider)
+    inflight = set()
+    first = True
+
+    while True:
+        mounts.refresh()
+        final_drives, custom_drives = resolve_drives(data.get("drives", []), mounts)
+        custom_set = set(custom_drives)
+        now = time.time()
+
+        for d, usage in sample_usage(final_drives, args.timeout, inflight, provider).items():
+            record = {"time": round(now, 3), "drive": d, "name": custom_names.get(d, default_name(d)),
+                      "custom": d in custom_set}
+            if usage is None:
+                record["error"] = "unreachable"
+            else:
+                record.update(total=usage.total, used=usage.used, free=usage.free, percent=usage.percent)
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+
+        if first and args.timing:
+            print(json.dumps({"startup_ms": round(process_uptime_ms(), 1)}), file=sys.stderr, flush=True)
+        first = False
+
+        if args.interval <= 0:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(run_headless())
+    except (KeyboardInterrupt, BrokenPipeError):
+        sys.exit(0)
@@ -1,15 +1,1555 @@
-import sys, psutil, os, json
+import sys
+
+# The collector is Qt-free; answer --headless and --agent before PyQt6 is
+# even imported
+if __name__ == "__main__" and ("--headless" in sys.argv or "--agent" in sys.argv):
+    from DriveCore import run_headless, run_agent
+    try:
+        sys.exit((run_agent if "--agent" in sys.argv else run_headless)(sys.argv[1:]))
+    except (KeyboardInterrupt, BrokenPipeError):
+        sys.exit(0)
+
+import os, json, queue, random, threading, time, fnmatch, hashlib
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QProgressBar,
     QHBoxLayout, QPushButton, QGraphicsDropShadowEffect, QLineEdit,
-    QFrame, QInputDialog, QMessageBox
+    QFrame, QInputDialog, QMessageBox, QListView, QStyledItemDelegate,
+    QAbstractItemView, QStyle, QDialog, QMenu, QTreeWidget, QTreeWidgetItem,
+    QSystemTrayIcon, QGraphicsScene, QGraphicsPixmapItem
 )
-from PyQt6.QtCore import Qt, QPoint, QTimer, QRect, QSize
-from PyQt6.QtGui import QColor
+from PyQt6.QtCore import (
+    Qt, QPoint, QPointF, QRectF, QTimer, QRect, QSize, QObject, pyqtSignal,
+    QAbstractListModel, QModelIndex
+)
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF, QFont, QShortcut, QKeySequence, QPixmap, QRegion
+
+from DriveCore import (
+    CONFIG_FILE, ConfigStore, UsageHistory, UsageSnapshot, MountTable, PollScheduler, VolumeIndex, volume_id, default_provider, Metrics, MetricsServer,
+    SpaceScanner, DiskIOMonitor, AlertEngine, NotificationLimiter, run_alert_command,
+    DeltaDecoder, parse_address, format_bytes, format_rates, default_name, resolve_drives, process_uptime_ms
+)
+
+# One stylesheet for the whole window, parsed once. Per-drive color state is
+# switched through the ``level`` dynamic property on each bar instead of
+# per-widget sheets, so refreshes never re-parse CSS.
+STYLE_SHEET = """
+    QFrame#panel {
+        background-color: rgba(255, 255, 255, 80);
+        border-top-left-radius: 20px;
+        border-top-right-radius: 20px;
+        border-bottom-left-radius: 5px; 
+        border-bottom-right-radius: 5px;
+    }
+    QFrame#panel[cached="true"] {
+        background: transparent;
+    }
+    QLabel#title {
+        font-weight: bold; font-size: 16px; color: #000; background: transparent;
+    }
+    QPushButton#toolButton, QPushButton#closeButton {
+        background-color: rgba(255,255,255,120);
+        border-radius: 12px;
+        font-size: 14px;
+    }
+    QPushButton#toolButton:hover {
+        background-color: rgba(100,100,100,120);
+        color: white;
+    }
+    QPushButton#closeButton:hover {
+        background-color: #FF3B30;
+        color: white;
+    }
+    QPushButton#toggleButton {
+        background-color: #0078D7; 
+        color: white;
+        border: 2px solid rgba(255, 255, 255, 180);
+        border-radius: 20px;
+        font-size: 18px;
+    }
+    QPushButton#toggleButton:hover { background-color: #0056a3; }
+
+    QFrame#driveRow {
+        background-color: rgba(255,255,255,140);
+        border-radius: 10px;
+    }
+    QLineEdit#driveName {
+        border: none; background: transparent; font-size: 14px; color: #000;
+    }
+    QLabel#driveSpace { background: transparent; }
+    QLabel#driveIO { background: transparent; color: #333; font-size: 10px; }
+    QFrame#hostGroup { background: transparent; }
+    QLabel#hostTitle { background: transparent; font-weight: bold; color: #333; }
+    QPushButton#moveButton {
+        background-color: rgba(255,255,255,50);
+        border-radius: 11px;
+        font-size: 14px;
+        color: black;
+    }
+    QPushButton#moveButton:hover {
+        background-color: rgba(255,255,255,100);
+        color: black;
+    }
+    QProgressBar#driveBar {
+        border: none; border-radius: 4px; background: rgba(255,255,255,80);
+    }
+    QProgressBar#driveBar::chunk { border-radius: 4px; background-color: #0078D7; }
+    QProgressBar#driveBar[level="low"]::chunk { background-color: #FF3B30; }
+    QProgressBar#driveBar[level="stale"]::chunk { background-color: #8E8E93; }
+    QListView#driveList { background: transparent; border: none; }
+    QLabel#debugOverlay {
+        background-color: rgba(0, 0, 0, 170); color: white;
+        font-family: monospace; font-size: 11px;
+        border-radius: 6px; padding: 6px;
+    }
+"""
+
+# Bar colors for the painted list, matching the [level=...] rules above
+LEVEL_COLORS = {"ok": QColor("#0078D7"), "low": QColor("#FF3B30"), "stale": QColor("#8E8E93")}
+
+
+def draw_sparkline(painter, rect, values, min_span=0.01):
+    if len(values) < 2:
+        return
+    lo = min(values)
+    span = max(max(values) - lo, min_span)
+    step = rect.width() / (len(values) - 1)
+    line = QPolygonF([QPointF(rect.left() + i * step, rect.bottom() - (v - lo) / span * rect.height())
+                      for i, v in enumerate(values)])
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(QPen(QColor("#0078D7"), 1.2))
+    painter.drawPolyline(line)
+
+
+def render_panel(size, ratio, blur=25, color=QColor(0, 0, 0, 100)):
+    """The empty panel with its drop shadow, as a QGraphicsDropShadowEffect
+    on the live frame would draw it, clipped to the panel's own rect."""
+    panel = QFrame()
+    panel.setObjectName("panel")
+    panel.setStyleSheet(STYLE_SHEET)
+    panel.resize(size)
+    source = QPixmap(size * ratio)
+    source.setDevicePixelRatio(ratio)
+    source.fill(Qt.GlobalColor.transparent)
+    panel.render(source, QPoint(), QRegion(), QWidget.RenderFlag.DrawChildren)
+
+    # The effect only runs inside a scene or on a widget; a throwaway scene
+    # applies it once instead of on every repaint
+    item = QGraphicsPixmapItem(source)
+    shadow = QGraphicsDropShadowEffect()
+    shadow.setBlurRadius(blur)
+    shadow.setColor(color)
+    shadow.setOffset(0, 0)
+    item.setGraphicsEffect(shadow)
+    scene = QGraphicsScene()
+    scene.addItem(item)
+
+    target = QPixmap(size * ratio)
+    target.setDevicePixelRatio(ratio)
+    target.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(target)
+    rect = QRectF(0, 0, size.width(), size.height())
+    scene.render(painter, rect, rect)
+    painter.end()
+    return target
+
+class SampleBatch:
+    """Batchable jobs stat'ed back to back on the batch thread.
+
+    ``results`` grows as the thread works through ``jobs``; ``lock`` keeps
+    abandoning the batch and recording a finished stat apart.
+    """
+    __slots__ = ("jobs", "results", "abandoned", "lock")
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.results = []
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+
+class DriveSampler(QObject):
+    """Stats drives on a pool of daemon worker threads.
+
+    Results come back on the GUI thread through ``sampled`` and
+    ``unreachable``; drives passed in ``identify`` also report their
+    ``volume_id`` through ``identified`` first. A drive whose previous stat
+    is still running is not queued again.
+
+    The timeout runs from when a worker picks a drive up, not from when it
+    was queued. A worker stuck past it is written off and replaced: it no
+    longer counts against ``max_workers`` and exits once its stat returns.
+    A drive that has timed out is stat'ed on a thread of its own until it
+    answers in time again, so a dead share never holds up the pool. Drives
+    the provider calls batchable are stat'ed back to back on one dedicated
+    thread and reported as one batch. If a batch overruns the timeout, the
+    drive it is stuck on is written off like a pool job, the rest go to the
+    pool and a fresh batch thread takes over.
+    """
+    sampled = pyqtSignal(str, object)
+    unreachable = pyqtSignal(str)
+    identified = pyqtSignal(str, object)
+    _started = pyqtSignal(str, object)
+    _completed = pyqtSignal(str, object, object, object)
+    _batch_started = pyqtSignal(object)
+    _batch_completed = pyqtSignal(object)
+
+    def __init__(self, provider, timeout_ms=2000, workers=4, max_workers=32, parent=None):
+        super().__init__(parent)
+        self.provider = provider
+        self.timeout_ms = timeout_ms
+        self.max_workers = max_workers
+        self._jobs = queue.SimpleQueue()
+        self._batches = queue.SimpleQueue()
+        self._batch_thread = None
+        self._pending = {}  # path -> token of the job in flight
+        self._threads = 0  # live pool workers; written-off ones are not counted
+        self._lock = threading.Lock()
+        self._running = {}         # token of a job being stat'ed -> True if on a pool worker
+        self._written_off = set()  # running tokens past their deadline
+        self._late = set()         # tokens reported unreachable, result still due
+        self._suspects = set()     # paths whose last stat timed out
+        self.metrics = None  # a Metrics instance when instrumentation is on
+        self._started.connect(self._on_started)
+        self._completed.connect(self._on_completed)
+        self._batch_started.connect(self._on_batch_started)
+        self._batch_completed.connect(self._on_batch_completed)
+        for _ in range(workers):
+            self._spawn_worker()
+
+    def _spawn_worker(self):
+        if self._threads >= self.max_workers:
+            return
+        self._threads += 1
+        threading.Thread(target=self._worker, name="drive-sampler", daemon=True).start()
+
+    def _stat(self, path, identify):
+        vid = None
+        if identify:
+            try:
+                vid = volume_id(path)
+            except OSError:
+                pass  # left unidentified; it is simply stat'ed on its own
+        metrics = self.metrics
+        start = time.perf_counter() if metrics else 0.0
+        try:
+            result = self.provider.usage(path)
+        except Exception as e:
+            result = e
+        if metrics:
+            metrics.observe("disk_usage_seconds", time.perf_counter() - start, drive=path)
+        return result, vid
+
+    def _run(self, job, pooled):
+        path, token, identify = job
+        with self._lock:
+            self._running[token] = pooled
+        self._started.emit(path, token)
+        result = self._stat(path, identify)
+        with self._lock:
+            del self._running[token]
+            written_off = token in self._written_off
+            self._written_off.discard(token)
+        self._completed.emit(path, token, *result)
+        return written_off
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if self._run(job, True):
+                return  # a replacement already serves the queue
+
+    def _batch_worker(self, batches):
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            self._batch_started.emit(batch)
+            for path, token, identify in batch.jobs:
+                result = (path, token, *self._stat(path, identify))
+                with batch.lock:
+                    if batch.abandoned:
+                        # Given up on while this stat hung: report it late
+                        # and leave the queue to the replacement thread
+                        self._completed.emit(*result)
+                        return
+                    batch.results.append(result)
+            self._batch_completed.emit(batch.results)
+
+    def _start_batch_thread(self):
+        self._batch_thread = threading.Thread(target=self._batch_worker, args=(self._batches,),
+                                              name="drive-sampler-batch", daemon=True)
+        self._batch_thread.start()
+
+    def sample(self, drives, identify=()):
+        batch = []
+        for d in drives:
+            if d in self._pending:
+                continue
+            token = object()
+            self._pending[d] = token
+            if d in self._suspects:
+                threading.Thread(target=self._run, args=((d, token, d in identify), False),
+                                 name="drive-sampler-suspect", daemon=True).start()
+            elif self.provider.batchable(d):
+                batch.append((d, token, d in identify))
+            else:
+                self._jobs.put((d, token, d in identify))
+
+        if batch:
+            if self._batch_thread is None:
+                self._start_batch_thread()
+            self._batches.put(SampleBatch(batch))
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def _on_started(self, path, token):
+        QTimer.singleShot(self.timeout_ms, lambda: self._check_deadline(path, token))
+
+    def _check_deadline(self, path, token):
+        with self._lock:
+            pooled = self._running.get(token)
+            if pooled is not None:
+                self._written_off.add(token)
+        if pooled is None:
+            return  # finished in time; the result is on its way
+        if self.metrics:
+            self.metrics.inc("stat_timeouts_total", drive=path)
+        self._late.add(token)
+        self._suspects.add(path)
+        self.unreachable.emit(path)
+        if pooled:
+            self._threads -= 1
+            self._spawn_worker()
+
+    def _on_batch_started(self, batch):
+        QTimer.singleShot(self.timeout_ms, lambda: self._check_batch_deadline(batch))
+
+    def _check_batch_deadline(self, batch):
+        with batch.lock:
+            done = len(batch.results)
+            if done == len(batch.jobs):
+                return  # finished in time; the results are on their way
+            batch.abandoned = True
+
+        # Keep what the stuck thread finished and write off the drive it is
+        # stuck on; that drive is stat'ed on its own thread from now on
+        self._on_batch_completed(batch.results[:done])
+        path, token, _ = batch.jobs[done]
+        if self.metrics:
+            self.metrics.inc("stat_timeouts_total", drive=path)
+        self._late.add(token)
+        self._suspects.add(path)
+        self.unreachable.emit(path)
+
+        # The rest of this batch goes to the pool, later batches to a new thread
+        for job in batch.jobs[done + 1:]:
+            self._jobs.put(job)
+        stuck = self._batches
+        self._batches = queue.SimpleQueue()
+        self._start_batch_thread()
+        while True:
+            try:
+                queued = stuck.get_nowait()
+            except queue.Empty:
+                break
+            self._batches.put(queued)
+
+    def _on_batch_completed(self, results):
+        for result in results:
+            self._on_completed(*result)
+
+    def _on_completed(self, path, token, result, vid):
+        if self._pending.get(path) is token:
+            del self._pending[path]
+        if token in self._late:
+            self._late.discard(token)
+        else:
+            self._suspects.discard(path)  # answered in time; back to the pool
+        if vid is not None:
+            self.identified.emit(path, vid)
+        if isinstance(result, Exception):
+            if self.metrics:
+                self.metrics.inc("stat_errors_total", drive=path, error=type(result).__name__)
+            self.unreachable.emit(path)
+        else:
+            self.sampled.emit(path, result)
+
+    def stop(self):
+        for _ in range(self._threads):
+            self._jobs.put(None)
+        self._threads = 0
+        if self._batch_thread is not None:
+            self._batches.put(None)
+            self._batch_thread = None
+
+
+class Sparkline(QWidget):
+    """Tiny line chart of a drive's used fraction over its stored history."""
+    MIN_SPAN = 0.01
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(60, 16)
+        self._values = []
+
+    def set_values(self, values):
+        if values != self._values:
+            self._values = values
+            self.update()
+
+    def paintEvent(self, event):
+        if len(self._values) < 2:
+            return
+        painter = QPainter(self)
+        draw_sparkline(painter, QRectF(0, 0, self.width() - 1, self.height() - 1), self._values, self.MIN_SPAN)
+
+
+class DriveRow(QFrame):
+    """One persistent drive row, kept alive across refreshes.
+
+    Setters compare against the last applied state so a refresh only
+    touches widgets whose text, value or color actually changed.
+    """
+    renamed = pyqtSignal(str, str)
+    move_requested = pyqtSignal(str, int)
+    breakdown_requested = pyqtSignal(str)
+
+    TOOLTIP = "Right-click to see what's using the space"
+
+    def __init__(self, drive, parent=None):
+        super().__init__(parent)
+        self.setObjectName("driveRow")
+        self.setToolTip(self.TOOLTIP)
+        self.drive = drive
+        self._level = None
+        self._is_custom = None
+
+        self.nameEdit = QLineEdit(default_name(drive))
+        self.nameEdit.setObjectName("driveName")
+        self.nameEdit.editingFinished.connect(lambda: self.renamed.emit(self.drive, self.nameEdit.text()))
+
+        self.space_label = QLabel("Loading…")
+        self.space_label.setObjectName("driveSpace")
+
+        self.up_btn = QPushButton("△")
+        self.down_btn = QPushButton("▽")
+        for btn in [self.up_btn, self.down_btn]:
+            btn.setFixedSize(22, 22)
+            btn.setObjectName("moveButton")
+        self.up_btn.clicked.connect(lambda: self.move_requested.emit(self.drive, -1))
+        self.down_btn.clicked.connect(lambda: self.move_requested.emit(self.drive, 1))
+
+        self.progress = QProgressBar()
+        self.progress.setObjectName("driveBar")
+        self.progress.setRange(0, 100)
+        self.progress.setValue(0)
+        self.progress.setTextVisible(False)
+        self.progress.setFixedHeight(8)
+
+        self.io_label = None  # created on first use; most shares never need it
+
+        self.sparkline = Sparkline()
+
+        row = QHBoxLayout()
+        row.addWidget(self.nameEdit)
+        row.addWidget(self.sparkline)
+        row.addWidget(self.space_label)
+        row.addWidget(self.up_btn)
+        row.addWidget(self.down_btn)
+        row.setSpacing(5)
+
+        self.bar_layout = QHBoxLayout()
+        self.bar_layout.addWidget(self.progress)
+        self.bar_layout.setSpacing(8)
+
+        col = QVBoxLayout(self)
+        col.addLayout(row)
+        col.addLayout(self.bar_layout)
+        col.setSpacing(5)
+        col.setContentsMargins(10, 10, 10, 10)
+
+    def set_name(self, name):
+        # Never clobber a name the user is in the middle of editing
+        if not self.nameEdit.hasFocus() and self.nameEdit.text() != name:
+            self.nameEdit.setText(name)
+
+    def set_custom(self, is_custom):
+        if is_custom == self._is_custom:
+            return
+        self._is_custom = is_custom
+        for btn in [self.up_btn, self.down_btn]:
+            btn.setEnabled(is_custom)
+            btn.setVisible(is_custom)
+
+    def set_history(self, values):
+        self.sparkline.set_values(values)
+
+    def set_io(self, text):
+        """Throughput shown beside the bar; empty for drives without a local disk."""
+        if self.io_label is None:
+            if not text:
+                return
+            self.io_label = QLabel()
+            self.io_label.setObjectName("driveIO")
+            self.bar_layout.addWidget(self.io_label)
+        if self.io_label.text() != text:
+            self.io_label.setText(text)
+            self.io_label.setVisible(bool(text))
+
+    def set_aliases(self, names):
+        """Names of the other drives on the same volume, listed in the tooltip."""
+        tip = self.TOOLTIP + ("\nSame volume as: " + ", ".join(names) if names else "")
+        if self.toolTip() != tip:
+            self.setToolTip(tip)
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        menu.addAction("What's using the space?", lambda: self.breakdown_requested.emit(self.drive))
+        menu.exec(event.globalPos())
+
+    def set_usage(self, text, percent, level):
+        """``level`` is "ok", "low" or "stale" and picks the bar color."""
+        if self.space_label.text() != text:
+            self.space_label.setText(text)
+        if self.progress.value() != percent:
+            self.progress.setValue(percent)
+        if self._level != level:
+            self._level = level
+            # Re-polish just this bar so the [level=...] rules re-match
+            self.progress.setProperty("level", level)
+            self.progress.style().unpolish(self.progress)
+            self.progress.style().polish(self.progress)
+
+
+class DriveEntry:
+    """Plain-data counterpart of DriveRow for the virtualized list.
+
+    Exposes the same setters so the widget drives both views the same way;
+    a change only emits ``dataChanged`` for its own row.
+    """
+    __slots__ = ("model", "drive", "name", "text", "percent", "level", "history", "is_custom", "aliases", "io")
+
+    def __init__(self, model, drive):
+        self.model = model
+        self.drive = drive
+        self.name = default_name(drive)
+        self.text = "Loading…"
+        self.percent = 0
+        self.level = "stale"
+        self.history = []
+        self.is_custom = False
+        self.aliases = ()
+        self.io = ""
+
+    def _set(self, attr, value):
+        if getattr(self, attr) != value:
+            setattr(self, attr, value)
+            self.model.entry_changed(self)
+
+    def set_name(self, name):
+        self._set("name", name)
+
+    def set_custom(self, is_custom):
+        self._set("is_custom", is_custom)
+
+    def set_history(self, values):
+        self._set("history", values)
+
+    def set_aliases(self, names):
+        self._set("aliases", tuple(names))
+
+    def set_io(self, text):
+        self._set("io", text)
+
+    def set_usage(self, text, percent, level):
+        if (self.text, self.percent, self.level) != (text, percent, level):
+            self.text, self.percent, self.level = text, percent, level
+            self.model.entry_changed(self)
+
+
+class DriveListModel(QAbstractListModel):
+    """Drive list model whose ``rows`` dict plays the role of the widget's row cache."""
+    renamed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = {}   # drive -> DriveEntry
+        self._order = []
+        self._index = {}  # drive -> row number
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def entry(self, row):
+        return self.rows[self._order[row]]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entry(index.row())
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return entry.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if entry.aliases:
+                return f"{entry.drive}\nSame volume as: {', '.join(entry.aliases)}"
+            return entry.drive
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        entry = self.entry(index.row())
+        entry.name = value
+        self.dataChanged.emit(index, index)
+        self.renamed.emit(entry.drive, value)
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if not index.isValid():
+            return flags | Qt.ItemFlag.ItemIsDropEnabled
+        flags |= Qt.ItemFlag.ItemIsEditable
+        if self.entry(index.row()).is_custom:
+            flags |= Qt.ItemFlag.ItemIsDragEnabled
+        return flags
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def entry_changed(self, entry):
+        row = self._index.get(entry.drive)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def set_drives(self, drives):
+        """Match the model to ``drives``. Returns ``(changed, added drives)``."""
+        if drives == self._order:
+            return False, []
+
+        if set(drives) == set(self._order):
+            # Pure reorder: keep selection and any open editor on their drive
+            self.layoutAboutToBeChanged.emit()
+            old_order = self._order
+            self._order = list(drives)
+            self._index = {d: i for i, d in enumerate(self._order)}
+            old = self.persistentIndexList()
+            self.changePersistentIndexList(old, [self.index(self._index[old_order[i.row()]]) for i in old])
+            self.layoutChanged.emit()
+            return True, []
+
+        self.beginResetModel()
+        keep = set(drives)
+        for d in list(self.rows):
+            if d not in keep:
+                del self.rows[d]
+        added = [d for d in drives if d not in self.rows]
+        for d in added:
+            self.rows[d] = DriveEntry(self, d)
+        self._order = list(drives)
+        self._index = {d: i for i, d in enumerate(self._order)}
+        self.endResetModel()
+        return True, added
+
+
+class DriveDelegate(QStyledItemDelegate):
+    """Paints a drive entry to look like a DriveRow, without any child widgets."""
+    ROW_HEIGHT = 62
+    ROW_WIDTH = 360
+    GAP = 6
+    PADDING = 10
+    BAR_HEIGHT = 8
+
+    def sizeHint(self, option, index):
+        return QSize(self.ROW_WIDTH, self.ROW_HEIGHT)
+
+    def _name_rect(self, rect):
+        inner = QRectF(rect).adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING - self.GAP)
+        return QRectF(inner.left(), inner.top(), inner.width() / 2, inner.height() - self.BAR_HEIGHT - 5)
+
+    def paint(self, painter, option, index):
+        entry = index.model().entry(index.row())
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+
+        card = QRectF(option.rect).adjusted(0, 0, 0, -self.GAP)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        painter.setBrush(QColor(255, 255, 255, 180 if selected else 140))
+        painter.drawRoundedRect(card, 10, 10)
+
+        inner = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        top = QRectF(inner.left(), inner.top(), inner.width(), inner.height() - self.BAR_HEIGHT - 5)
+        bar = QRectF(inner.left(), inner.bottom() - self.BAR_HEIGHT, inner.width(), self.BAR_HEIGHT)
+
+        painter.setPen(QColor("#000"))
+        painter.setFont(option.font)
+        text_width = option.fontMetrics.horizontalAdvance(entry.text)
+        text_rect = QRectF(top.right() - text_width, top.top(), text_width, top.height())
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight, entry.text)
+
+        spark_rect = QRectF(text_rect.left() - 65, top.center().y() - 8, 59, 15)
+        draw_sparkline(painter, spark_rect, entry.history)
+
+        name_font = QFont(option.font)
+        name_font.setPixelSize(14)
+        painter.setFont(name_font)
+        painter.setPen(QColor("#000"))
+        name_rect = QRectF(top.left(), top.top(), max(0.0, spark_rect.left() - 5 - top.left()), top.height())
+        name = painter.fontMetrics().elidedText(entry.name, Qt.TextElideMode.ElideRight, int(name_rect.width()))
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, name)
+
+        if entry.io:
+            io_font = QFont(option.font)
+            io_font.setPixelSize(10)
+            painter.setFont(io_font)
+            painter.setPen(QColor("#333"))
+            io_width = painter.fontMetrics().horizontalAdvance(entry.io)
+            io_rect = QRectF(bar.right() - io_width, bar.center().y() - 7, io_width, 14)
+            painter.drawText(io_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight, entry.io)
+            bar.setRight(io_rect.left() - 8)
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 255, 255, 80))
+        painter.drawRoundedRect(bar, 4, 4)
+        if entry.percent > 0:
+            painter.setBrush(LEVEL_COLORS.get(entry.level, LEVEL_COLORS["ok"]))
+            painter.drawRoundedRect(QRectF(bar.left(), bar.top(), bar.width() * entry.percent / 100, bar.height()), 4, 4)
+        painter.restore()
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setObjectName("driveName")
+        return editor
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(self._name_rect(option.rect).toRect())
+
+
+def move_target(order, customs, drive, row=None, step=0):
+    """The custom drive whose place ``drive`` takes, or None.
+
+    ``order`` is what a view shows and ``customs`` the custom drives among
+    it. Views filter, collapse aliases and pin C: first, so a position in
+    one says nothing about an index in the collector's custom list: moves
+    are made relative to a drive instead. ``step`` moves past the next
+    custom row up or down; ``row`` is a drop position, where a system row
+    stands for the top of the custom drives if it is above them and for
+    the bottom otherwise.
+    """
+    shown = [d for d in order if d in customs]
+    if drive not in shown:
+        return None
+    if step:
+        i = shown.index(drive) + step
+        return shown[i] if 0 <= i < len(shown) else None
+    target = order[min(max(row, 0), len(order) - 1)]
+    if target in customs:
+        return target
+    return shown[0] if order.index(target) < order.index(shown[0]) else shown[-1]
+
+
+class DriveListView(QListView):
+    """Virtualized drive list: only visible rows are painted and no per-row
+    widgets exist. Double-click renames; dragging a custom drive or
+    Ctrl+Up/Down reorders it."""
+    move_requested = pyqtSignal(str, str)  # drive, custom drive whose place it takes
+    breakdown_requested = pyqtSignal(str)
+
+    def __init__(self, max_height=360, parent=None):
+        super().__init__(parent)
+        self.setObjectName("driveList")
+        self.setItemDelegate(DriveDelegate(self))
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.EditKeyPressed)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.setMaximumHeight(max_height)
+        self.viewport().setAutoFillBackground(False)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.modelReset.connect(self.updateGeometry)
+
+    def sizeHint(self):
+        rows = self.model().rowCount() if self.model() is not None else 0
+        height = rows * DriveDelegate.ROW_HEIGHT + 2 * self.frameWidth()
+        return QSize(DriveDelegate.ROW_WIDTH, min(height, self.maximumHeight()))
+
+    def minimumSizeHint(self):
+        return self.sizeHint()
+
+    def _request_move(self, source, row=None, step=0):
+        model = self.model()
+        entries = [model.entry(r) for r in range(model.rowCount())]
+        order = [e.drive for e in entries]
+        target = move_target(order, {e.drive for e in entries if e.is_custom}, order[source], row, step)
+        if target is not None and target != order[source]:
+            self.move_requested.emit(order[source], target)
+
+    def keyPressEvent(self, event):
+        current = self.currentIndex()
+        if (current.isValid() and event.modifiers() & Qt.KeyboardModifier.ControlModifier
+                and event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down)):
+            self._request_move(current.row(), step=-1 if event.key() == Qt.Key.Key_Up else 1)
+            return
+        super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        index = self.indexAt(event.pos())
+        if not index.isValid():
+            return
+        drive = self.model().entry(index.row()).drive
+        menu = QMenu(self)
+        menu.addAction("What's using the space?", lambda: self.breakdown_requested.emit(drive))
+        menu.exec(event.globalPos())
+
+    def dropEvent(self, event):
+        # The widget owns the order; turn the drop into a move request rather
+        # than letting Qt shuffle the model itself
+        source = self.currentIndex()
+        target = self.indexAt(event.position().toPoint())
+        event.setDropAction(Qt.DropAction.IgnoreAction)
+        event.accept()
+        if source.isValid():
+            row = target.row() if target.isValid() else self.model().rowCount() - 1
+            self._request_move(source.row(), row)
+
+
+class ScanRunner(QObject):
+    """Runs one SpaceScanner.scan on a daemon thread and reports back through signals."""
+    progress = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, scanner, root, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.root = root
+        self._cancel = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="space-scan-runner", daemon=True).start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        # The dialog may be closed (and this object deleted) mid-scan
+        try:
+            try:
+                result = self.scanner.scan(self.root, self.progress.emit, self._cancel)
+            except OSError as e:
+                self.failed.emit(str(e))
+                return
+            self.finished.emit(result)
+        except RuntimeError:
+            pass
+
+
+class BreakdownDialog(QDialog):
+    """Largest folders and files under a drive, filled in while the scan runs.
+
+    Double-click a folder to drill into it; rescans reuse the scanner's
+    mtime cache, so only changed directories are listed again, but every
+    file size is read fresh.
+    """
+
+    def __init__(self, scanner, root, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Space used on {root}")
+        self.resize(520, 480)
+        self.scanner = scanner
+        self.drive_root = root
+        self.runner = None
+        self.path = root
+
+        self.status = QLabel()
+        self.folders = QTreeWidget()
+        self.folders.setHeaderLabels(["Size", "Folder"])
+        self.folders.setRootIsDecorated(False)
+        self.folders.itemDoubleClicked.connect(lambda item: self.start_scan(item.data(1, Qt.ItemDataRole.UserRole)))
+        self.files = QTreeWidget()
+        self.files.setHeaderLabels(["Size", "Largest files"])
+        self.files.setRootIsDecorated(False)
+
+        self.upBtn = QPushButton("Up")
+        self.upBtn.clicked.connect(lambda: self.start_scan(os.path.dirname(self.path.rstrip("\\/")) or self.path))
+        self.rescanBtn = QPushButton("Rescan")
+        self.rescanBtn.clicked.connect(lambda: self.start_scan(self.path))
+        self.cancelBtn = QPushButton("Cancel")
+        self.cancelBtn.clicked.connect(self._cancel)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.upBtn)
+        buttons.addStretch()
+        buttons.addWidget(self.rescanBtn)
+        buttons.addWidget(self.cancelBtn)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.status)
+        layout.addWidget(self.folders, 2)
+        layout.addWidget(self.files, 1)
+        layout.addLayout(buttons)
+
+        self.start_scan(root)
+
+    def start_scan(self, path):
+        if not path:
+            return
+        self._cancel()
+        self.path = path
+        self.upBtn.setEnabled(os.path.normcase(path) != os.path.normcase(self.drive_root))
+        self.status.setText(f"Scanning {path}…")
+        self.cancelBtn.setEnabled(True)
+        self.runner = ScanRunner(self.scanner, path, self)
+        self.runner.progress.connect(self._show)
+        self.runner.finished.connect(self._show)
+        self.runner.failed.connect(lambda err: self.status.setText(f"Scan failed: {err}"))
+        self.runner.start()
+
+    def _cancel(self):
+        if self.runner is not None:
+            self.runner.cancel()
+            for signal in (self.runner.progress, self.runner.finished, self.runner.failed):
+                signal.disconnect()
+            self.runner = None
+        self.cancelBtn.setEnabled(False)
+        if self.status.text().startswith("Scanning"):
+            self.status.setText(f"Cancelled scan of {self.path}")
+
+    def _show(self, result):
+        self.folders.clear()
+        for size, path in result.children:
+            item = QTreeWidgetItem([format_bytes(size), os.path.basename(path) or path])
+            item.setData(1, Qt.ItemDataRole.UserRole, path)
+            self.folders.addTopLevelItem(item)
+        self.files.clear()
+        for size, path in result.largest_files:
+            self.files.addTopLevelItem(QTreeWidgetItem([format_bytes(size), path]))
+        for tree in (self.folders, self.files):
+            tree.resizeColumnToContents(0)
+
+        state = "Done" if result.complete else "Scanning"
+        self.status.setText(
+            f"{state}: {format_bytes(result.total)} in {result.dirs_scanned + result.dirs_reused} folders "
+            f"({result.dirs_reused} unchanged since last scan, {result.errors} unreadable) — {result.elapsed:.1f} s"
+        )
+        if result.complete:
+            self.cancelBtn.setEnabled(False)
+            self.runner = None
+
+    def closeEvent(self, event):
+        self._cancel()
+        super().closeEvent(event)
+
+
+class AgentClient(QObject):
+    """Persistent connection to one remote ``--agent``.
+
+    Mirrors the agent's drive table from its delta batches and emits what
+    changed. Whenever the connection drops or the stream is garbled it
+    reconnects with jittered exponential backoff; the agent then starts over
+    with a full table.
+    """
+    changed = pyqtSignal(str, object, object)  # label, {path: usage or None}, [removed paths]
+    status_changed = pyqtSignal(str, str)      # label, status text ("" when live)
+    MIN_BACKOFF = 1.0
+    MAX_BACKOFF = 60.0
+
+    def __init__(self, label, address, parent=None):
+        super().__init__(parent)
+        # QtNetwork is only loaded when remote hosts are configured
+        from PyQt6.QtNetwork import QTcpSocket, QLocalSocket
+        self.label = label
+        self.kind, self.target = parse_address(address)
+        self.socket = QLocalSocket(self) if self.kind == "unix" else QTcpSocket(self)
+        self.socket.readyRead.connect(self._on_ready_read)
+        self.socket.disconnected.connect(self._schedule_retry)
+        self.socket.errorOccurred.connect(self._schedule_retry)
+        self.decoder = DeltaDecoder()
+        self.backoff = self.MIN_BACKOFF
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self.connect_to_agent)
+        self._closing = False
+
+    def connect_to_agent(self):
+        self.decoder.reset()
+        self.status_changed.emit(self.label, "connecting…")
+        if self.kind == "unix":
+            self.socket.connectToServer(self.target)
+        else:
+            self.socket.connectToHost(*self.target)
+
+    def _schedule_retry(self, *args):
+        if self._closing or self.retry_timer.isActive():
+            return
+        delay = self.backoff * random.uniform(0.8, 1.2)
+        self.backoff = min(self.backoff * 2, self.MAX_BACKOFF)
+        self.retry_timer.start(int(delay * 1000))
+        self.socket.abort()  # may re-enter through disconnected; the timer guards
+        self.status_changed.emit(self.label, f"offline, retrying in {delay:.0f} s")
+
+    def _on_ready_read(self):
+        try:
+            while self.socket.canReadLine():
+                message = json.loads(bytes(self.socket.readLine()).decode("utf-8"))
+                changed, removed = self.decoder.feed(message)
+                if message.get("type") == "hello":
+                    self.status_changed.emit(self.label, "")
+                if changed or removed:
+                    self.changed.emit(self.label, changed, removed)
+                self.backoff = self.MIN_BACKOFF
+        except (ValueError, KeyError, AttributeError) as e:
+            print(f"Agent Error ({self.label}): {e}", file=sys.stderr)
+            self._schedule_retry()
+
+    def close(self):
+        self._closing = True
+        self.retry_timer.stop()
+        self.socket.abort()
+
+
+class HostGroup(QFrame):
+    """Titled block holding the drive rows of one remote host."""
+
+    def __init__(self, label, named=False, parent=None):
+        super().__init__(parent)
+        self.setObjectName("hostGroup")
+        self.label = label
+        self.named = named  # a configured name wins over the agent's hostname
+        self.title = QLabel()
+        self.title.setObjectName("hostTitle")
+        self.rows_layout = QVBoxLayout(self)
+        self.rows_layout.setContentsMargins(0, 0, 0, 0)
+        self.rows_layout.setSpacing(10)
+        self.rows_layout.addWidget(self.title)
+        self.set_status("connecting…")
+
+    def set_status(self, status, host=None):
+        text = f"🖥 {self.label if self.named else host or self.label}"
+        self.title.setText(f"{text} · {status}" if status else text)
+
+    def add_row(self, row):
+        self.rows_layout.addWidget(row)
+        row.show()
+
+    def remove_row(self, row):
+        self.rows_layout.removeWidget(row)
+        row.deleteLater()
+
+
+def instance_name():
+    # One collector per user and config file: a second launch from the same
+    # directory joins it, a copy run elsewhere with its own config does not
+    user = os.environ.get("USER") or os.environ.get("USERNAME") or "user"
+    digest = hashlib.sha1(os.path.abspath(CONFIG_FILE).encode("utf-8")).hexdigest()[:12]
+    return f"DriveWidget-{user}-{digest}"
+
+
+def forward_to_running_instance(patterns, timeout_ms=500):
+    """Ask an already running collector to open a view; True if one did."""
+    from PyQt6.QtNetwork import QLocalSocket
+    socket = QLocalSocket()
+    socket.connectToServer(instance_name())
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    socket.write((json.dumps({"cmd": "open", "filter": list(patterns)}) + "\n").encode("utf-8"))
+    socket.waitForBytesWritten(timeout_ms)
+    socket.disconnectFromServer()
+    return True
+
+
+def claim_instance(patterns, wait_s=5.0):
+    """Make this process the collector for its config, or hand ``patterns``
+    to the collector that already is.
+
+    Returns ``(server, lock)`` with the QLocalServer listening, or None once
+    a running collector has taken the request. The lock file, not the
+    socket, decides who is the collector, so two launches at the same
+    moment cannot both take the socket over.
+    """
+    from PyQt6.QtCore import QLockFile, QDir
+    from PyQt6.QtNetwork import QLocalServer
+    name = instance_name()
+    lock = QLockFile(os.path.join(QDir.tempPath(), f"{name}.lock"))
+    lock.setStaleLockTime(0)  # stale only once the process holding it is gone
+    deadline = time.monotonic() + wait_s
+    while not lock.tryLock(100):
+        # Held by a live collector, which may not be listening quite yet
+        if forward_to_running_instance(patterns):
+            return None
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{lock.fileName()} is held by a collector that does not answer")
+
+    # With access options set, listen() renames its socket over whatever
+    # holds the name, live or not. Anything that still answers there is a
+    # collector that does not take the lock: leave it in charge.
+    if forward_to_running_instance(patterns):
+        lock.unlock()
+        return None
+    server = QLocalServer()
+    server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+    if not server.listen(name):
+        # Nobody answered, so this is the socket of a collector that died
+        QLocalServer.removeServer(name)
+        if not server.listen(name):
+            print(f"Instance Server Error: {server.errorString()}", file=sys.stderr)
+    return server, lock
+
+
+class DriveCollector(QObject):
+    """The one sampler, config and history owner shared by every open view.
+
+    Views only render what the collector tells them through its signals;
+    drives no view shows are not sampled at all, and ``CONFIG_FILE`` is
+    only ever written from here. A second launch of the widget hands its
+    window over to the running collector (see ``claim_instance``) instead of
+    starting its own timers.
+    """
+    drives_changed = pyqtSignal()              # drive list, order or aliases
+    renamed = pyqtSignal(str)                  # drive whose custom name changed
+    usage_changed = pyqtSignal(str)            # drive or "host:path" with new numbers or state
+    history_changed = pyqtSignal(str)          # drive whose sparkline moved
+    io_changed = pyqtSignal(str)               # physical disk whose rates moved
+    remote_changed = pyqtSignal(str, object, object)  # label, [changed paths], [removed paths]
+    remote_status = pyqtSignal(str, str)       # label, status text ("" when live)
+
+    # Process start to the first frame of any view on screen, in milliseconds
+    first_painted = pyqtSignal(float)
+
+    # How often the scheduler is asked which drives are due, normally and
+    # while every view is collapsed to its toggle button
+    POLL_TICK_MS = 1000
+    LOW_POWER_TICK_MS = 10000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.views = []
+        self.custom_names = {}
+        self.custom_drives = []
+        self.drive_usage = {}
+        self.stale_drives = set()
+        self.all_drives = []
+        self.drive_order = []  # what at least one view shows, in display order
+        self._shown = set()
+        self.remote_keys = set()
+        self.volumes = VolumeIndex()
+        self.store = ConfigStore()
+        self.load_data()
+        self.provider = default_provider(self.settings.get("provider"))
+        self.mount_table = MountTable(self.provider)
+        self.scheduler = PollScheduler()
+        self.history = UsageHistory()
+        self.history.load()
+        self.snapshot = UsageSnapshot()
+        self.snapshot.load()
+        self.first_paint_ms = None
+        self.server = None
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setInterval(1000)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.timeout.connect(self.save_data)
+
+        self.sampler = DriveSampler(self.provider, parent=self)
+        self.sampler.sampled.connect(self._on_sampled)
+        self.sampler.unreachable.connect(self._on_unreachable)
+        self.sampler.identified.connect(self._on_identified)
+
+        self.metrics = None
+        self.metrics_server = None
+        self.space_scanner = None
+        self.io = DiskIOMonitor()
+        self.agents = {}        # agent label -> AgentClient
+        self.remote_state = {}  # agent label -> last status text
+
+        self.alerts = AlertEngine(self.settings.get("alerts"))
+        self.notifier = NotificationLimiter()
+        self.alert_pending = set()
+        self.tray = None
+        if self.settings.get("metrics_port") is not None:
+            self.enable_metrics()
+            try:
+                self.metrics_server = MetricsServer(self.metrics, int(self.settings["metrics_port"]))
+            except (OSError, ValueError) as e:
+                print(f"Metrics Server Error: {e}", file=sys.stderr)
+
+        self.history_timer = QTimer(self)
+        self.history_timer.timeout.connect(self.save_history)
+        self.history_timer.timeout.connect(self.save_snapshot)
+        self.history_timer.start(int(UsageHistory.INTERVAL * 1000))
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._poll_tick)
+        self.timer.start(self.POLL_TICK_MS)
+
+        # Last-known drives and numbers, painted before anything is stat'ed.
+        # They read as stale until each drive's first fresh sample lands.
+        cached = self.snapshot.usage
+        self.drive_usage.update(cached)
+        self.stale_drives.update(cached)
+        self.all_drives = self.snapshot.drives
+        self._connect_agents()
+
+    # --- Views and instances ---
+
+    def listen(self, server, lock):
+        # Later launches connect here to open their view; see claim_instance
+        self.server = server
+        self.instance_lock = lock
+        server.setParent(self)
+        server.newConnection.connect(self._on_instance_connection)
+
+    def _on_instance_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self._on_instance_message(s))
+            socket.disconnected.connect(socket.deleteLater)
+            self._on_instance_message(socket)
+
+    def _on_instance_message(self, socket):
+        while socket.canReadLine():
+            try:
+                message = json.loads(bytes(socket.readLine()).decode("utf-8"))
+            except ValueError as e:
+                print(f"Instance Message Error: {e}", file=sys.stderr)
+                continue
+            if message.get("cmd") == "open":
+                self.open_view(message.get("filter") or [])
+
+    def open_views(self, patterns=None):
+        # "views": [{"name": "Data", "filter": ["D:*", "//nas/*"]}, ...] opens
+        # one window per entry; --filter on the command line opens just one
+        if patterns:
+            return [self.open_view(patterns)]
+        configs = self.settings.get("views") or [{}]
+        return [self.open_view(v.get("filter") or [], v.get("name")) for v in configs]
+
+    def open_view(self, patterns=(), name=None):
+        view = DriveWidget(self, patterns, name)
+        view.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        offset = 30 * len(self.views)
+        view.move(view.initial_pos + QPoint(offset, offset))
+        self.views.append(view)
+        self._update_order()
+        view.refresh_drives()
+        view.show()
+        view.raise_()
+        view.activateWindow()
+        if self.first_paint_ms is not None:
+            self._sample_due()
+        return view
+
+    def close_view(self, view):
+        if view in self.views:
+            self.views.remove(view)
+        if self.views:
+            self._update_order()
+            self.update_power()
+        else:
+            self.shutdown()
+
+    def view_painted(self):
+        if self.first_paint_ms is None:
+            self.first_paint_ms = process_uptime_ms()
+            self.first_painted.emit(self.first_paint_ms)
+            # The snapshot is on screen; now enumerate and sample for real
+            QTimer.singleShot(0, self.refresh_drives)
+
+    def update_power(self):
+        # Nobody can see the numbers once every view is collapsed to its button
+        low = all(v.is_minimized for v in self.views)
+        if low == self.scheduler.low_power:
+            return
+        self.scheduler.low_power = low
+        self.timer.setInterval(self.LOW_POWER_TICK_MS if low else self.POLL_TICK_MS)
+        if not low:
+            self.scheduler.expedite()
+            self._poll_tick()
+
+    def shutdown(self):
+        self.save_data()
+        self.save_history()
+        self.save_snapshot()
+        self.timer.stop()
+        self.sampler.stop()
+        for client in self.agents.values():
+            client.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.server is not None:
+            self.server.close()
+            self.instance_lock.unlock()
+
+    # --- Config ---
+
+    def load_data(self):
+        data = self.store.load()
+        self.custom_names = data.get("names", {})
+        self.custom_drives = data.get("drives", [])
+        # Everything else (e.g. "view", "list_max_height") is kept verbatim
+        self.settings = {k: v for k, v in data.items() if k not in ("names", "drives")}
+
+    def _config_data(self):
+        return {"names": self.custom_names, "drives": self.custom_drives, **self.settings}
+
+    def save_data(self):
+        self.save_timer.stop()
+        try:
+            self.store.save(self._config_data())
+        except Exception as e:
+            print(f"Save Error: {e}", file=sys.stderr)
+            self.count_swallowed("save_config")
+
+    def schedule_save(self):
+        # Coalesce bursts of changes into one write; clean state costs no I/O
+        if self.store.is_dirty(self._config_data()):
+            self.save_timer.start()
+
+    def move_drive(self, drive, target):
+        # Views name the custom drive whose place ``drive`` takes; see move_target
+        if drive != target and drive in self.custom_drives and target in self.custom_drives:
+            idx = self.custom_drives.index(target)
+            self.custom_drives.remove(drive)
+            self.custom_drives.insert(idx, drive)
+            self.refresh_drives()
+
+    def update_name(self, drive, text):
+        if text.startswith("💾 ") or text.startswith("🌐 "):
+            text = text[2:]
+
+        self.custom_names[drive] = text
+        self.schedule_save()
+        self.renamed.emit(drive)
+
+    def add_drive(self, path):
+        if not os.path.exists(path):
+            return False
+        self.mount_table.invalidate()
+        self.mount_table.refresh()
+        if path not in self.custom_drives and not self.mount_table.is_device(path):
+            self.custom_drives.append(path)
+        self.refresh_drives()
+        return True
+
+    def remove_drive(self, path):
+        self.custom_drives.remove(path)
+        self.custom_names.pop(path, None)
+        self.refresh_drives()
+
+    def name_of(self, drive):
+        return self.custom_names.get(drive, default_name(drive))
+
+    def alias_names(self, drive):
+        return [self.name_of(a) for a in self.volumes.aliases(drive) if a != drive]
+
+    # --- Sampling ---
+
+    def refresh_drives(self):
+        start = time.perf_counter() if self.metrics else None
+        self.mount_table.refresh()
+        final_drives, self.custom_drives = resolve_drives(self.custom_drives, self.mount_table)
+        self.all_drives = final_drives
+        self.volumes.forget(set(final_drives))
+        self.io.map_drives(final_drives, self.mount_table.partitions)
+        self._update_order()
+        self.drives_changed.emit()
+
+        self.schedule_save()
+
+        self.scheduler.forget(set(final_drives))
+        self.alerts.forget(set(final_drives) | self.remote_keys)
+        self._sample_due()
+
+        if start is not None:
+            self.metrics.observe("refresh_seconds", time.perf_counter() - start)
+
+    def _update_order(self):
+        # "collapse_aliases" shows each volume once, as the row of its first path
+        drives = self.all_drives
+        if self.settings.get("collapse_aliases"):
+            drives = [group[0] for group in self.volumes.groups(drives)]
+        self.drive_order = [d for d in drives if any(v.shows(d) for v in self.views)]
+        self._shown = set(self.drive_order)
+
+    def _sample_due(self):
+        # Usage is sampled off the GUI thread; rows fill in as results arrive.
+        # Aliases of one volume share a single stat.
+        due = self.volumes.representatives(self.scheduler.due(self.drive_order))
+        self.sampler.sample(due, {d for d in due if self.volumes.needs_identity(d)})
+
+    def _poll_tick(self):
+        # Full reconciliation only when the mount table moved; otherwise just
+        # hand the drives that are due to the sampler
+        start = time.perf_counter() if self.metrics else None
+        if self.mount_table.refresh():
+            self.volumes.invalidate()
+            self.refresh_drives()
+        else:
+            self._sample_due()
+        self._update_io()
+        self._evaluate_alerts()
+        if start is not None:
+            self.metrics.observe("tick_seconds", time.perf_counter() - start)
+
+    def _update_io(self):
+        # One counter read per tick; only rows on a disk whose rate moved are touched
+        start = time.perf_counter() if self.metrics else None
+        for disk in self.io.poll():
+            self.io_changed.emit(disk)
+        if start is not None:
+            self.metrics.observe("io_poll_seconds", time.perf_counter() - start)
+
+    def _evaluate_alerts(self):
+        # One batch pass of every rule over the samples that arrived this tick
+        samples = []
+        for d in self.alert_pending:
+            usage = self.drive_usage.get(d)
+            if usage is not None:
+                samples.append((d, usage.free, usage.total))
+        self.alert_pending.clear()
+
+        events = self.alerts.evaluate(samples, self.history.hours_to_full) if samples else []
+        for drive in {e.drive for e in events}:
+            self.usage_changed.emit(drive)
+
+        deliver, summary = self.notifier.filter(events)
+        for event in deliver:
+            self._notify(event.message())
+            command = event.rule.command or self.settings.get("alert_command")
+            if command:
+                run_alert_command(command, event)
+        if summary:
+            self._notify(summary)
+
+    def _notify(self, text):
+        if self.tray is None and QSystemTrayIcon.isSystemTrayAvailable():
+            icon = QApplication.style().standardIcon(QStyle.StandardPixmap.SP_DriveHDIcon)
+            self.tray = QSystemTrayIcon(icon, self)
+            self.tray.show()
+        if self.tray is not None:
+            self.tray.showMessage("Drive Monitor", text, QSystemTrayIcon.MessageIcon.Warning)
+        else:
+            print(f"Alert: {text}", file=sys.stderr)
+
+    def _on_identified(self, path, vid):
+        if self.volumes.identify(path, vid):
+            self._update_order()
+            self.drives_changed.emit()
+
+    def _on_sampled(self, path, usage):
+        # One stat per volume stands for every alias that has a row
+        for drive in self.volumes.aliases(path):
+            if drive in self._shown:
+                self._record_sample(drive, usage)
+
+    def _record_sample(self, drive, usage):
+        self.scheduler.record(drive, usage.free)
+        if self.history.record(drive, usage.free, usage.total):
+            self.history_changed.emit(drive)
+        self.drive_usage[drive] = usage
+        self.alert_pending.add(drive)
+        self.stale_drives.discard(drive)
+        self.usage_changed.emit(drive)
+
+    def _on_unreachable(self, path):
+        for drive in self.volumes.aliases(path):
+            if drive in self._shown:
+                self.scheduler.record_failure(drive)
+                self.stale_drives.add(drive)
+                self.usage_changed.emit(drive)
+
+    def save_history(self):
+        self.history.forget(set(self.drive_order))
+        try:
+            self.history.save()
+        except Exception as e:
+            print(f"History Save Error: {e}", file=sys.stderr)
+            self.count_swallowed("save_history")
+
+    def save_snapshot(self):
+        try:
+            self.snapshot.save(self.drive_order, self.drive_usage)
+        except Exception as e:
+            print(f"Snapshot Save Error: {e}", file=sys.stderr)
+            self.count_swallowed("save_snapshot")
+
+    def scanner(self):
+        if self.space_scanner is None:
+            self.space_scanner = SpaceScanner()
+        return self.space_scanner
+
+    # --- Remote hosts ---
+
+    def _connect_agents(self):
+        # "agents": ["nas:9470", {"name": "build", "address": "unix:/run/drive-agent.sock"}]
+        for entry in self.settings.get("agents", []):
+            if isinstance(entry, str):
+                entry = {"address": entry}
+            label = entry.get("name") or entry["address"]
+            try:
+                client = AgentClient(label, entry["address"], self)
+            except (KeyError, ValueError) as e:
+                print(f"Agent Config Error: {e}", file=sys.stderr)
+                continue
+            client.named = bool(entry.get("name"))
+            client.changed.connect(self._on_remote_changed)
+            client.status_changed.connect(self._on_remote_status)
+            self.agents[label] = client
+            client.connect_to_agent()
+
+    def _on_remote_status(self, label, status):
+        client = self.agents[label]
+        self.remote_state[label] = status
+        if status and not status.startswith("connecting"):
+            # Lost the agent: keep the last numbers, but show them as stale
+            for path in client.decoder.table:
+                self.stale_drives.add(f"{label}:{path}")
+        self.remote_status.emit(label, status)
+
+    def _on_remote_changed(self, label, changed, removed):
+        for path in removed:
+            key = f"{label}:{path}"
+            self.remote_keys.discard(key)
+            self.drive_usage.pop(key, None)
+            self.stale_drives.discard(key)
+
+        for path, usage in changed.items():
+            key = f"{label}:{path}"
+            self.remote_keys.add(key)
+            if usage is None:
+                self.stale_drives.add(key)
+            else:
+                self.drive_usage[key] = usage
+                self.stale_drives.discard(key)
+                self.alert_pending.add(key)
+        self.remote_changed.emit(label, list(changed), removed)
+
+    # --- Instrumentation ---
+
+    def enable_metrics(self):
+        if self.metrics is None:
+            self.metrics = Metrics()
+            self.sampler.metrics = self.metrics
+
+    def count_swallowed(self, site):
+        if self.metrics:
+            self.metrics.inc("swallowed_errors_total", site=site)
 
-CONFIG_FILE = "drive_data.json"
 
 class DriveWidget(QWidget):
+    """One window onto a ``DriveCollector``.
+
+    ``patterns`` are globs like the alert rules' (``"D:*"``, ``"nas:*"``);
+    a view with none shows every drive.
+    """
     # Fixed sizes and margins for stability
     MIN_ICON_SIZE = QSize(40, 40)
     ICON_PADDING = 10 # Padding around the icon when visible
@@ -17,21 +1557,39 @@ class DriveWidget(QWidget):
     # Space reserved at the bottom for the icon when restored
     BOTTOM_RESERVE = MIN_ICON_SIZE.height() + ICON_PADDING
 
-    def __init__(self):
+    def __init__(self, collector, patterns=(), name=None):
         super().__init__()
-        self.custom_names = {}
-        self.custom_drives = []
+        self.collector = collector
+        self.patterns = list(patterns)
+        self.name = name
         self.is_minimized = False
         self.drag_position = None
+        self.drive_rows = {}
+        self.drive_order = []
+        self.host_groups = {}  # agent label -> HostGroup
+        self.remote_rows = {}  # "label:path" -> DriveRow
+        self.settings = collector.settings
+        self._painted = False
         
         # Default position and size
         self.initial_pos = QPoint(100, 100) 
         # Increased height for icon space when restored
         self.full_geometry = QRect(self.initial_pos.x(), self.initial_pos.y(), 400, 250) 
 
-        self.load_data()
         self.initUI()
-        self.refresh_drives()
+
+        collector.drives_changed.connect(self.refresh_drives)
+        collector.renamed.connect(self._on_renamed)
+        collector.usage_changed.connect(self._apply_usage)
+        collector.history_changed.connect(self._on_history_changed)
+        collector.io_changed.connect(self._on_io_changed)
+        collector.remote_changed.connect(self._on_remote_changed)
+        collector.remote_status.connect(self._on_remote_status)
+        for label, client in collector.agents.items():
+            # Unfiltered views list every host up front, even before it answers
+            if not self.patterns:
+                self._host_group(label)
+            self._on_remote_changed(label, list(client.decoder.table), [])
         
         self.move(self.initial_pos)
 
@@ -41,6 +1599,7 @@ class DriveWidget(QWidget):
         
         # Set a minimum size to prevent the window from collapsing to 0x0
         self.setMinimumSize(self.MIN_ICON_SIZE)
+        self.setStyleSheet(STYLE_SHEET)
 
         self.shadow = QGraphicsDropShadowEffect()
         self.shadow.setBlurRadius(25)
@@ -54,16 +1613,15 @@ class DriveWidget(QWidget):
 
         # Content Frame (The large, main body of the UI)
         self.frame = QFrame()
-        self.frame.setGraphicsEffect(self.shadow)
-        self.frame.setStyleSheet("""
-            QFrame {
-                background-color: rgba(255, 255, 255, 80);
-                border-top-left-radius: 20px;
-                border-top-right-radius: 20px;
-                border-bottom-left-radius: 5px; 
-                border-bottom-right-radius: 5px;
-            }
-        """)
+        self.frame.setObjectName("panel")
+        # "render": "cached" paints the panel and its shadow from one pixmap
+        # per size (see paintEvent). A live effect re-renders and re-blurs
+        # the whole panel whenever any label in it changes.
+        self.panel_cache = None
+        if self.settings.get("render") == "cached":
+            self.frame.setProperty("cached", True)
+        else:
+            self.frame.setGraphicsEffect(self.shadow)
 
         self.frame_layout = QVBoxLayout(self.frame)
         self.frame_layout.setContentsMargins(15, 15, 15, 15)
@@ -71,15 +1629,15 @@ class DriveWidget(QWidget):
 
         # --- Top bar ---
         topbar = QHBoxLayout()
-        self.title = QLabel("Drive Monitor")
-        self.title.setStyleSheet("font-weight: bold; font-size: 16px; color: #000; background: transparent;")
+        self.title = QLabel(self.name or "Drive Monitor")
+        self.title.setObjectName("title")
 
         self.addBtn = self._create_button("+", self.add_drive)
         self.removeBtn = self._create_button("-", self.remove_drive)
-        self.saveBtn = self._create_button("💾", self.save_data)
+        self.saveBtn = self._create_button("💾", self.collector.save_data)
         self.closeBtn = QPushButton("x")
         self.closeBtn.setFixedSize(25, 25)
-        self.closeBtn.setStyleSheet(self._close_btn_style())
+        self.closeBtn.setObjectName("closeButton")
         self.closeBtn.clicked.connect(self.close)
 
 
@@ -96,6 +1654,19 @@ class DriveWidget(QWidget):
         self.frame_layout.addLayout(self.drive_layout)
         self.drive_layout.addStretch(1)
 
+        # "view": "list" in drive_data.json swaps the widget rows for a
+        # virtualized, scrollable list for hosts with many mounts
+        self.drive_model = None
+        if self.settings.get("view") == "list":
+            self.drive_model = DriveListModel(self)
+            self.drive_model.renamed.connect(self.collector.update_name)
+            self.drive_rows = self.drive_model.rows
+            self.drive_view = DriveListView(self.settings.get("list_max_height", 360))
+            self.drive_view.setModel(self.drive_model)
+            self.drive_view.move_requested.connect(self.collector.move_drive)
+            self.drive_view.breakdown_requested.connect(self.show_breakdown)
+            self.drive_layout.insertWidget(0, self.drive_view)
+
         frame_wrapper = QWidget()
         frame_wrapper_layout = QVBoxLayout(frame_wrapper)
         frame_wrapper_layout.setContentsMargins(0,0,0,0)
@@ -109,16 +1680,7 @@ class DriveWidget(QWidget):
         # --- Toggle Button (Child Widget) ---
         self.toggleBtn = QPushButton("📊", self) 
         self.toggleBtn.setFixedSize(self.MIN_ICON_SIZE)
-        self.toggleBtn.setStyleSheet("""
-            QPushButton {
-                background-color: #0078D7; 
-                color: white;
-                border: 2px solid rgba(255, 255, 255, 180);
-                border-radius: 20px;
-                font-size: 18px;
-            }
-            QPushButton:hover { background-color: #0056a3; }
-        """)
+        self.toggleBtn.setObjectName("toggleButton")
         self.toggleBtn.clicked.connect(self.toggle_window)
         
         # Initial position of button (bottom right)
@@ -134,227 +1696,250 @@ class DriveWidget(QWidget):
         self.restore_timer.setInterval(500) 
         self.restore_timer.setSingleShot(True)
         self.restore_timer.timeout.connect(self._auto_restore)
-        
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.refresh_drives)
-        self.timer.start(5000)
+
+        # --- Hidden debug overlay (Ctrl+Shift+D) ---
+        self.debug_overlay = QLabel(self.frame)
+        self.debug_overlay.setObjectName("debugOverlay")
+        self.debug_overlay.hide()
+        self.overlay_timer = QTimer(self)
+        self.overlay_timer.setInterval(1000)
+        self.overlay_timer.timeout.connect(self._update_debug_overlay)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.toggle_debug_overlay)
 
     # --- Utility Functions ---
 
     def _create_button(self, text, handler):
         btn = QPushButton(text)
         btn.setFixedSize(25, 25)
-        btn.setStyleSheet(self.btnStyle(is_move_button=False))
+        btn.setObjectName("toolButton")
         btn.clicked.connect(handler)
         return btn
 
-    def btnStyle(self, is_move_button=False):
-        if is_move_button:
-            return """
-                QPushButton {
-                    background-color: rgba(255,255,255,50);
-                    border-radius: 11px;
-                    font-size: 14px;
-                    color: black;
-                }
-                QPushButton:hover {
-                    background-color: rgba(255,255,255,100);
-                    color: black;
-                }
-            """
-        else:
-            return """
-                QPushButton {
-                    background-color: rgba(255,255,255,120);
-                    border-radius: 12px;
-                    font-size: 14px;
-                }
-                QPushButton:hover {
-                    background-color: rgba(100,100,100,120);
-                    color: white;
-                }
-            """
-
-    def _close_btn_style(self):
-        return """
-            QPushButton {
-                background-color: rgba(255,255,255,120);
-                border-radius: 12px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #FF3B30;
-                color: white;
-            }
-        """
-        
-    def load_data(self):
-        try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, "r") as f:
-                    data = json.load(f)
-                    self.custom_names = data.get("names", {})
-                    self.custom_drives = data.get("drives", [])
-        except Exception:
-            self.custom_names = {}
-            self.custom_drives = []
-
-    def save_data(self):
-        data = {"names": self.custom_names, "drives": self.custom_drives}
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(data, f, indent=4)
-
-    def _clear_layout(self, layout):
-        if layout is not None:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-                else:
-                    self._clear_layout(item.layout())
-
-    def move_drive(self, drive, direction):
-        if drive in self.custom_drives:
-            idx = self.custom_drives.index(drive)
-            new_idx = idx + direction
-            if 0 <= new_idx < len(self.custom_drives):
-                self.custom_drives[idx], self.custom_drives[new_idx] = self.custom_drives[new_idx], self.custom_drives[idx]
-                self.refresh_drives()
-
-    def update_name(self, drive, edit):
-        text = edit.text()
-        if text.startswith("💾 ") or text.startswith("🌐 "):
-            text = text[2:]
+    def shows(self, drive):
+        return not self.patterns or any(fnmatch.fnmatch(drive, p) for p in self.patterns)
 
-        self.custom_names[drive] = text
-        self.save_data()
-        
     def refresh_drives(self):
-        for i in reversed(range(self.drive_layout.count())):
-            item = self.drive_layout.itemAt(i)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-            elif item.layout():
-                if i < self.drive_layout.count() - 1 or item.layout().count() > 0:
-                     self._clear_layout(item.layout())
+        # The collector owns the drive list; a view only lays out its share
+        self._layout_drives([d for d in self.collector.drive_order if self.shows(d)])
 
-        if self.drive_layout.count() > 0:
-            stretch_item = self.drive_layout.takeAt(self.drive_layout.count() - 1)
-            if stretch_item and stretch_item.spacerItem():
-                del stretch_item
+    def _layout_drives(self, final_drives):
+        collector = self.collector
+        if self.drive_model is not None:
+            changed, added = self.drive_model.set_drives(final_drives)
+        else:
+            changed, added = self._reconcile_rows(final_drives)
 
-        system_drives = [d.device for d in psutil.disk_partitions(all=False) if 'removable' not in d.opts and d.device.startswith(('A:', 'B:', 'C:', 'D:', 'E:', 'F:', 'G:', 'H:', 'I:', 'J:', 'K:', 'L:', 'M:', 'N:', 'O:', 'P:', 'Q:', 'R:', 'S:', 'T:', 'U:', 'V:', 'W:', 'X:', 'Y:', 'Z:', '//', '\\\\'))]
+        for d in added:
+            self.drive_rows[d].set_history(collector.history.series(d))
 
-        final_drives = []
-        for d in self.custom_drives:
-            if d not in final_drives:
-                final_drives.append(d)
+        for d in final_drives:
+            row = self.drive_rows[d]
+            row.set_name(collector.name_of(d))
+            row.set_custom(d in collector.custom_drives)
+            row.set_aliases(collector.alias_names(d))
+            rates = collector.io.rates_for(d)
+            row.set_io(format_rates(rates) if rates else "")
+            self._apply_usage(d)
+
+        if changed:
+            self.drive_order = final_drives
+            if self.drive_model is not None:
+                self.drive_view.updateGeometry()
+            self._fit_to_contents()
+
+    def _move_row(self, drive, step):
+        target = move_target(self.drive_order, set(self.collector.custom_drives), drive, step=step)
+        if target is not None:
+            self.collector.move_drive(drive, target)
+
+    def _fit_to_contents(self):
+        self.adjustSize()
 
-        for d in system_drives:
-            if d not in final_drives:
-                 final_drives.append(d)
+        # Reposition the button to the bottom right corner of the dedicated space
+        if not self.is_minimized:
+            self.toggleBtn.move(self.width() - self.MIN_ICON_SIZE.width() - self.ICON_PADDING, 
+                                self.height() - self.MIN_ICON_SIZE.height() - self.ICON_PADDING)
+
+    def _reconcile_rows(self, final_drives):
+        # Keyed row cache: only rows for added or removed drives are built or
+        # torn down, everything else is updated in place by the caller.
+        changed = final_drives != self.drive_order
+        final_set = set(final_drives)
+        for d in list(self.drive_rows):
+            if d not in final_set:
+                row = self.drive_rows.pop(d)
+                self.drive_layout.removeWidget(row)
+                row.deleteLater()
+                changed = True
+
+        added = []
+        for d in final_drives:
+            if d not in self.drive_rows:
+                row = DriveRow(d)
+                row.renamed.connect(self.collector.update_name)
+                row.move_requested.connect(self._move_row)
+                row.breakdown_requested.connect(self.show_breakdown)
+                self.drive_rows[d] = row
+                added.append(d)
+
+        if changed or added:
+            for i, d in enumerate(final_drives):
+                row = self.drive_rows[d]
+                if self.drive_layout.indexOf(row) != i:
+                    self.drive_layout.removeWidget(row)
+                    self.drive_layout.insertWidget(i, row)
+            # Rows added to an already visible window are only shown later by
+            # the layout; show them now so adjustSize() accounts for them
+            for d in added:
+                self.drive_rows[d].show()
+        return bool(changed or added), added
+
+    def _on_renamed(self, drive):
+        row = self.drive_rows.get(drive) or self.remote_rows.get(drive)
+        if row is not None:
+            row.set_name(self.collector.name_of(drive))
+
+    def _on_history_changed(self, drive):
+        row = self.drive_rows.get(drive)
+        if row is not None:
+            row.set_history(self.collector.history.series(drive))
+
+    def _on_io_changed(self, disk):
+        io = self.collector.io
+        text = format_rates(io.rates[disk])
+        for d in io.drives_on(disk):
+            row = self.drive_rows.get(d)
+            if row is not None:
+                row.set_io(text)
+
+    # --- Remote hosts ---
+
+    def _host_group(self, label):
+        group = self.host_groups.get(label)
+        if group is None:
+            client = self.collector.agents[label]
+            group = HostGroup(label, client.named)
+            group.set_status(self.collector.remote_state.get(label, "connecting…"), client.decoder.host)
+            # Host groups sit below the local drives, above the stretch
+            self.drive_layout.insertWidget(self.drive_layout.count() - 1, group)
+            group.show()
+            self.host_groups[label] = group
+            self._fit_to_contents()
+        return group
+
+    def _on_remote_status(self, label, status):
+        group = self.host_groups.get(label)
+        if group is None:
+            return
+        client = self.collector.agents[label]
+        group.set_status(status, client.decoder.host)
+        for path in client.decoder.table:
+            self._apply_usage(f"{label}:{path}")
+
+    def _on_remote_changed(self, label, changed, removed):
+        resized = False
+        for path in removed:
+            row = self.remote_rows.pop(f"{label}:{path}", None)
+            if row is not None:
+                self.host_groups[label].remove_row(row)
+                resized = True
+
+        client = self.collector.agents[label]
+        for path in changed:
+            key = f"{label}:{path}"
+            if key not in self.remote_rows:
+                if not self.shows(key):
+                    continue
+                row = DriveRow(key)
+                row.setToolTip(f"{path} on {client.decoder.host or label}")
+                row.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
+                row.set_custom(False)
+                row.set_name(self.collector.custom_names.get(key, default_name(path)))
+                row.renamed.connect(self.collector.update_name)
+                self._host_group(label).add_row(row)
+                self.remote_rows[key] = row
+                resized = True
+            self._apply_usage(key)
+
+        if resized:
+            self._fit_to_contents()
+
+    def _apply_usage(self, drive):
+        row = self.drive_rows.get(drive)
+        if row is None:
+            row = self.remote_rows.get(drive)
+        if row is None:
+            return
+        collector = self.collector
+        usage = collector.drive_usage.get(drive)
+        stale = drive in collector.stale_drives
 
-        if sys.platform.startswith('win'):
-            c_drive = next((drive for drive in final_drives if drive.lower().startswith('c:')), None)
-            if c_drive and final_drives.index(c_drive) != 0:
-                final_drives.remove(c_drive)
-                final_drives.insert(0, c_drive)
+        if usage is None:
+            row.set_usage("stale / unreachable" if stale else "Loading…", 0, "stale")
+            return
 
+        total_gb = usage.total / (1024**3)
+        free_gb = usage.free / (1024**3)
 
-        self.custom_drives = [d for d in final_drives if d not in system_drives]
+        if stale:
+            level = "stale"
+        elif collector.alerts.is_firing(drive):
+            level = "low"
+        else:
+            level = "ok"
 
-        for d in final_drives:
-            try:
-                usage = psutil.disk_usage(d)
-                total_gb = usage.total / (1024**3)
-                free_gb = usage.free / (1024**3)
-                used_percent = usage.percent
-
-                if free_gb < 20.0:
-                    progress_color = "#FF3B30"
-                else:
-                    progress_color = "#0078D7"
-
-                mapped_icon = "🌐 " if d.startswith("\\\\") or d.startswith("//") else "💾 "
-                drive_name = self.custom_names.get(d, mapped_icon + d)
-
-                nameEdit = QLineEdit(drive_name)
-                nameEdit.setStyleSheet("QLineEdit { border: none; background: transparent; font-size: 14px; color: #000; }")
-                nameEdit.editingFinished.connect(lambda d=d, e=nameEdit: self.update_name(d, e))
-
-                space_label = QLabel(f"{free_gb:.1f} GB free of {total_gb:.1f} GB")
-                space_label.setStyleSheet("background: transparent;")
-
-                up_btn = QPushButton("△")
-                down_btn = QPushButton("▽")
-
-                is_custom = d in self.custom_drives
-
-                for btn in [up_btn, down_btn]:
-                    btn.setFixedSize(22, 22)
-                    btn.setStyleSheet(self.btnStyle(is_move_button=True))
-                    btn.setEnabled(is_custom)
-
-                if is_custom:
-                    up_btn.clicked.connect(lambda _, d=d: self.move_drive(d, -1))
-                    down_btn.clicked.connect(lambda _, d=d: self.move_drive(d, 1))
-
-                progress = QProgressBar()
-                progress.setRange(0, 100)
-                progress.setValue(int(used_percent))
-                progress.setTextVisible(False)
-                progress.setFixedHeight(8)
-
-                progress.setStyleSheet(f"""
-                    QProgressBar {{
-                        border: none; border-radius: 4px; background: rgba(255,255,255,80);
-                    }}
-                    QProgressBar::chunk {{
-                        border-radius: 4px; background-color: {progress_color};
-                    }}
-                """)
-
-                row = QHBoxLayout()
-                row.addWidget(nameEdit)
-                row.addWidget(space_label)
-                if is_custom:
-                    row.addWidget(up_btn)
-                    row.addWidget(down_btn)
-
-                row.setSpacing(5)
-
-                col = QVBoxLayout()
-                col.addLayout(row)
-                col.addWidget(progress)
-                col.setSpacing(5)
-                col.setContentsMargins(10, 10, 10, 10)
-
-                frame = QFrame()
-                frame.setLayout(col)
-                frame.setStyleSheet("""
-                    QFrame {
-                        background-color: rgba(255,255,255,140);
-                        border-radius: 10px;
-                    }
-                """)
-
-                self.drive_layout.addWidget(frame)
-
-            except Exception:
-                pass
+        text = f"{free_gb:.1f} GB free of {total_gb:.1f} GB"
+        hours = collector.history.hours_to_full(drive)
+        if hours is not None and hours < 24 * 30:
+            text += f" · full in {hours:.0f} h"
+        row.set_usage(text + " (stale)" if stale else text, int(usage.percent), level)
 
-        self.drive_layout.addStretch(1)
+    def show_breakdown(self, drive):
+        dialog = BreakdownDialog(self.collector.scanner(), drive, self)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
 
-        self.adjustSize()
-        self.save_data()
-        
-        # Reposition the button to the bottom right corner of the dedicated space
-        if not self.is_minimized:
-            self.toggleBtn.move(self.width() - self.MIN_ICON_SIZE.width() - self.ICON_PADDING, 
-                                self.height() - self.MIN_ICON_SIZE.height() - self.ICON_PADDING)
+    # --- Instrumentation ---
 
+    def toggle_debug_overlay(self):
+        if self.debug_overlay.isVisible():
+            self.overlay_timer.stop()
+            self.debug_overlay.hide()
+            return
+        self.collector.enable_metrics()
+        self._update_debug_overlay()
+        self.debug_overlay.move(10, 10)
+        self.debug_overlay.show()
+        self.debug_overlay.raise_()
+        self.overlay_timer.start()
+
+    def _update_debug_overlay(self):
+        m = self.collector.metrics
+
+        def ms(seconds):
+            return "-" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+        tick = m.merged("tick_seconds")
+        refresh = m.merged("refresh_seconds")
+        stats = m.merged("disk_usage_seconds")
+        lines = [
+            f"startup  first paint {self.collector.first_paint_ms or 0:.0f} ms",
+            f"tick     p50 ≤{ms(m.quantile('tick_seconds', 0.5))}  p95 ≤{ms(m.quantile('tick_seconds', 0.95))}  n={tick.count}",
+            f"refresh  p50 ≤{ms(m.quantile('refresh_seconds', 0.5))}  p95 ≤{ms(m.quantile('refresh_seconds', 0.95))}  n={refresh.count}",
+            f"stat     p50 ≤{ms(m.quantile('disk_usage_seconds', 0.5))}  p95 ≤{ms(m.quantile('disk_usage_seconds', 0.95))}  n={stats.count}",
+            f"errors {m.counter_total('stat_errors_total')}  timeouts {m.counter_total('stat_timeouts_total')}  "
+            f"swallowed {m.counter_total('swallowed_errors_total')}",
+        ]
+        for drive, mean in m.slowest("disk_usage_seconds", "drive"):
+            lines.append(f"  {ms(mean):>10}  {drive}")
+        if self.collector.metrics_server is not None:
+            lines.append(f"http://127.0.0.1:{self.collector.metrics_server.port}/metrics")
+        self.debug_overlay.setText("\n".join(lines))
+        self.debug_overlay.adjustSize()
+
+    def closeEvent(self, event):
+        self.collector.close_view(self)
+        super().closeEvent(event)
 
     def add_drive(self):
         path, ok = QInputDialog.getText(self, "Add Drive", "Enter drive path (e.g. D:\\ or \\\\network\\share):")
@@ -362,49 +1947,62 @@ class DriveWidget(QWidget):
             path = path.strip()
             if not path: return
 
-            normalized_path = os.path.normpath(path)
-            if os.path.exists(normalized_path):
-                is_system_drive = normalized_path in [d.device for d in psutil.disk_partitions(all=False)]
-                if normalized_path not in self.custom_drives and not is_system_drive:
-                    self.custom_drives.append(normalized_path)
-                self.refresh_drives()
-            else:
+            if not self.collector.add_drive(os.path.normpath(path)):
                 QMessageBox.warning(self, "Invalid", "Drive path not found or is inaccessible.")
 
     def remove_drive(self):
-        if not self.custom_drives:
+        custom_names = self.collector.custom_names
+        custom_drives = self.collector.custom_drives
+        if not custom_drives:
             QMessageBox.information(self, "Info", "No custom drives to remove.")
             return
 
-        drive_names = [self.custom_names.get(d, d) for d in self.custom_drives]
+        drive_names = [custom_names.get(d, d) for d in custom_drives]
         drive_name, ok = QInputDialog.getItem(
             self, "Remove Drive", "Select drive to remove:", drive_names, 0, False
         )
 
         if ok and drive_name:
             original_path = None
-            for path, name in self.custom_names.items():
+            for path, name in custom_names.items():
                 if name == drive_name:
                     original_path = path
                     break
 
             if not original_path:
-                for path in self.custom_drives:
-                     mapped_icon = "🌐 " if path.startswith("\\\\") or path.startswith("//") else "💾 "
-                     default_name = mapped_icon + path
-                     if drive_name == default_name:
+                for path in custom_drives:
+                     if drive_name == default_name(path):
                          original_path = path
                          break
 
-            if original_path and original_path in self.custom_drives:
-                self.custom_drives.remove(original_path)
-                if original_path in self.custom_names:
-                    del self.custom_names[original_path]
-                self.refresh_drives()
+            if original_path and original_path in custom_drives:
+                self.collector.remove_drive(original_path)
             else:
                 QMessageBox.warning(self, "Error", "Could not identify the drive to remove.")
 
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.frame.property("cached") and self.frame.isVisible():
+            self._paint_panel(event)
+        if not self._painted:
+            self._painted = True
+            self.collector.view_painted()
+            self.title.setToolTip(f"Started in {self.collector.first_paint_ms:.0f} ms")
+
+    def _paint_panel(self, event):
+        # Only the dirty region is copied; the blur runs again only on resize
+        size, ratio = self.frame.size(), self.devicePixelRatioF()
+        if self.panel_cache is None or self.panel_cache[:2] != (size, ratio):
+            start = time.perf_counter() if self.collector.metrics else None
+            self.panel_cache = (size, ratio, render_panel(size, ratio, self.shadow.blurRadius(), self.shadow.color()))
+            if start is not None:
+                self.collector.metrics.observe("panel_render_seconds", time.perf_counter() - start)
+        painter = QPainter(self)
+        painter.setClipRegion(event.region())
+        painter.drawPixmap(self.frame.mapTo(self, QPoint(0, 0)), self.panel_cache[2])
+        painter.end()
+
     # --- Drag, Hover, and Toggle Logic (Finalized Fixes) ---
     
     def mousePressEvent(self, event):
@@ -421,6 +2019,7 @@ class DriveWidget(QWidget):
                 self.full_geometry = self.geometry()
             except Exception as e:
                 print(f"Move Error: {e}")
+                self.collector.count_swallowed("move")
                 pass 
 
     def mouseReleaseEvent(self, event):
@@ -470,11 +2069,13 @@ class DriveWidget(QWidget):
                 self.setGeometry(target_rect)
             except Exception as e:
                 print(f"Minimize SetGeometry Failed (Ignored): {e}")
+                self.collector.count_swallowed("minimize")
                 
             self.toggleBtn.move(0, 0) # Button is moved to the top-left of the new, tiny window
             self.update() # Explicit repaint to force visibility (New)
 
             self.is_minimized = True
+            self.collector.update_power()
             
         else:
             # ---------------------
@@ -499,6 +2100,7 @@ class DriveWidget(QWidget):
                 self.setGeometry(final_rect)
             except Exception as e:
                 print(f"Restore SetGeometry Failed (Ignored): {e}")
+                self.collector.count_swallowed("restore")
                 
             # Button is moved back to the bottom-right corner of the restored window
             self.toggleBtn.move(self.width() - button_size.width() - icon_padding, 
@@ -506,11 +2108,30 @@ class DriveWidget(QWidget):
             self.frame.show()
             self.update() # Explicit repaint (New)
             self.is_minimized = False
+            self.collector.update_power()
 
 # --- Application Execution ---
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
-    window = DriveWidget()
-    window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    # --filter D:* //nas/* opens a view of just those drives
+    patterns = []
+    if "--filter" in sys.argv:
+        for arg in sys.argv[sys.argv.index("--filter") + 1:]:
+            if arg.startswith("--"):
+                break
+            patterns.append(arg)
+    # Become the collector for this config, or have the running one open the view
+    try:
+        instance = claim_instance(patterns)
+    except RuntimeError as e:
+        print(f"Instance Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if instance is None:
+        sys.exit(0)
+    collector = DriveCollector()
+    collector.listen(*instance)
+    if "--timing" in sys.argv:
+        collector.first_painted.connect(lambda ms: print(json.dumps({"startup_ms": round(ms, 1)}), file=sys.stderr, flush=True))
+    collector.open_views(patterns)
+    sys.exit(app.exec())
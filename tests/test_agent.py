@@ -0,0 +1,248 @@
+"""DriveAgent and the delta protocol, against agents on local sockets.
+
+Each test starts a real DriveAgent on an ephemeral TCP port or a Unix
+socket in a temporary directory, backed by a fake provider whose usage
+the test controls, and reads the JSON-line stream as a widget would.
+"""
+import os, sys, json, time, socket, tempfile, threading, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DriveCore import DriveAgent, DriveProvider, DeltaDecoder, DiskUsage, PROTOCOL_VERSION
+
+GB = 1024**3
+
+
+def usage(free_gb, total_gb=100):
+    free, total = free_gb * GB, total_gb * GB
+    return DiskUsage(total, total - free, free, round((total - free) / total * 100, 1))
+
+
+class FakeProvider(DriveProvider):
+    """No system mounts; the agent samples the config's custom drives.
+    A drive missing from ``table`` fails its stat."""
+    name = "fake"
+
+    def __init__(self, table):
+        self.table = table
+
+    def partitions(self):
+        return []
+
+    def system_drives(self, partitions):
+        return []
+
+    def usage(self, path):
+        if path not in self.table:
+            raise OSError(f"{path} is unreachable")
+        return self.table[path]
+
+
+class AgentTestCase(unittest.TestCase):
+    address = "127.0.0.1:0"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = os.path.join(self.tmp.name, "drive_data.json")
+        self.provider = FakeProvider({"/a": usage(50), "/b": usage(20)})
+        self.write_config(["/a", "/b"])
+        address = self.address.replace("{tmp}", self.tmp.name)
+        self.agent = DriveAgent(address, self.provider, self.config, interval=3600, timeout=1.0)
+        threading.Thread(target=self.agent.serve_forever, daemon=True).start()
+        # serve_forever samples once right away; wait for it so every client
+        # starts from the same full table
+        deadline = time.monotonic() + 5
+        while self.agent.encoder.seq < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.streams = []
+
+    def tearDown(self):
+        for stream in self.streams:
+            stream.close()
+        self.agent.stop()
+        self.tmp.cleanup()
+
+    def write_config(self, drives):
+        with open(self.config, "w") as f:
+            json.dump({"drives": drives}, f)
+
+    def connect(self):
+        if isinstance(self.agent.address, str):
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        conn.settimeout(5)
+        conn.connect(self.agent.address)
+        stream = conn.makefile("rb")
+        conn.close()  # the file object keeps the connection open
+        self.streams.append(stream)
+        return stream
+
+    def read(self, stream):
+        line = stream.readline()
+        self.assertTrue(line, "agent closed the connection")
+        return json.loads(line)
+
+
+class TcpAgentTest(AgentTestCase):
+
+    def test_hello_then_full_table(self):
+        stream = self.connect()
+        hello = self.read(stream)
+        self.assertEqual(hello["type"], "hello")
+        self.assertEqual(hello["version"], PROTOCOL_VERSION)
+        self.assertEqual(hello["host"], socket.gethostname())
+
+        full = self.read(stream)
+        self.assertTrue(full["full"])
+        self.assertEqual(full["seq"], 1)
+        self.assertEqual(full["removed"], [])
+        self.assertEqual(full["drives"]["/a"], usage(50)._asdict())
+        self.assertEqual(full["drives"]["/b"], usage(20)._asdict())
+
+    def test_delta_carries_only_changed_fields(self):
+        stream = self.connect()
+        self.read(stream), self.read(stream)
+
+        self.provider.table["/a"] = usage(40)
+        self.agent.tick()
+        batch = self.read(stream)
+        self.assertEqual(batch["seq"], 2)
+        self.assertNotIn("full", batch)
+        # /b did not move and total never changes: neither goes over the wire
+        self.assertEqual(batch["drives"], {"/a": {"used": 60 * GB, "free": 40 * GB, "percent": 60.0}})
+        self.assertEqual(batch["removed"], [])
+
+        # A tick in which nothing changed sends nothing, so the next batch
+        # follows straight on in sequence
+        self.agent.tick()
+        self.provider.table["/b"] = usage(19)
+        self.agent.tick()
+        batch = self.read(stream)
+        self.assertEqual(batch["seq"], 3)
+        self.assertEqual(set(batch["drives"]), {"/b"})
+
+    def test_unreachable_and_removed_drives(self):
+        stream = self.connect()
+        self.read(stream), self.read(stream)
+
+        del self.provider.table["/a"]
+        self.agent.tick()
+        self.assertEqual(self.read(stream)["drives"], {"/a": None})
+
+        self.write_config(["/a"])
+        self.agent.tick()
+        batch = self.read(stream)
+        self.assertEqual(batch["drives"], {})
+        self.assertEqual(batch["removed"], ["/b"])
+
+    def test_decoder_mirrors_the_stream(self):
+        stream = self.connect()
+        decoder = DeltaDecoder()
+        decoder.feed(self.read(stream))
+        self.assertEqual(decoder.host, socket.gethostname())
+        changed, removed = decoder.feed(self.read(stream))
+        self.assertEqual(changed, {"/a": usage(50), "/b": usage(20)})
+
+        self.provider.table["/a"] = usage(30)
+        self.write_config(["/a"])
+        self.agent.tick()
+        changed, removed = decoder.feed(self.read(stream))
+        self.assertEqual(changed, {"/a": usage(30)})
+        self.assertEqual(removed, ["/b"])
+        self.assertEqual(decoder.table, {"/a": usage(30)})
+
+    def test_each_client_gets_its_own_full_table(self):
+        first = self.connect()
+        self.read(first), self.read(first)
+        self.provider.table["/a"] = usage(45)
+        self.agent.tick()
+        self.read(first)
+
+        second = self.connect()
+        self.assertEqual(self.read(second)["type"], "hello")
+        full = self.read(second)
+        self.assertTrue(full["full"])
+        self.assertEqual(full["seq"], 2)
+        self.assertEqual(full["drives"]["/a"], usage(45)._asdict())
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "no Unix sockets on this platform")
+class UnixAgentTest(TcpAgentTest):
+    address = "unix:{tmp}/agent.sock"
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "no Unix sockets on this platform")
+class UnixSocketPathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "agent.sock")
+        self.address = "unix:" + self.path
+        self.config = os.path.join(self.tmp.name, "drive_data.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def agent(self):
+        return DriveAgent(self.address, FakeProvider({}), self.config)
+
+    def test_leaves_other_files_alone(self):
+        with open(self.path, "w") as f:
+            f.write("keep me")
+        with self.assertRaises(OSError):
+            self.agent()
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "keep me")
+
+    def test_does_not_take_over_a_live_agent(self):
+        first = self.agent()
+        try:
+            with self.assertRaises(OSError):
+                self.agent()
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            probe.connect(self.path)  # still the first agent's socket
+            probe.close()
+        finally:
+            first.stop()
+
+    def test_replaces_a_stale_socket(self):
+        dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        dead.bind(self.path)
+        dead.close()  # the socket file stays behind with nobody listening
+        self.agent().stop()
+
+
+class DeltaDecoderTest(unittest.TestCase):
+
+    def full(self, seq, drives):
+        return {"type": "batch", "seq": seq, "full": True, "drives": drives, "removed": []}
+
+    def test_sequence_gap_raises_and_full_table_resyncs(self):
+        decoder = DeltaDecoder()
+        decoder.feed(self.full(5, {"/a": usage(50)._asdict(), "/b": usage(20)._asdict()}))
+        with self.assertRaises(ValueError):
+            decoder.feed({"type": "batch", "seq": 7, "drives": {"/a": {"free": 1}}, "removed": []})
+        # The bad batch changed nothing
+        self.assertEqual(decoder.table["/a"], usage(50))
+
+        # After a reconnect the agent starts over with a full table, whatever
+        # its seq; drives missing from it count as removed
+        decoder.reset()
+        changed, removed = decoder.feed(self.full(9, {"/a": usage(40)._asdict()}))
+        self.assertEqual(changed, {"/a": usage(40)})
+        self.assertEqual(removed, ["/b"])
+        changed, removed = decoder.feed({"type": "batch", "seq": 10, "drives": {"/a": None}, "removed": []})
+        self.assertEqual(changed, {"/a": None})
+
+    def test_delta_before_any_full_table_raises(self):
+        with self.assertRaises(ValueError):
+            DeltaDecoder().feed({"type": "batch", "seq": 1, "drives": {}, "removed": []})
+
+    def test_unsupported_protocol_version_raises(self):
+        with self.assertRaises(ValueError):
+            DeltaDecoder().feed({"type": "hello", "version": PROTOCOL_VERSION + 1, "host": "x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
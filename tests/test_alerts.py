@@ -0,0 +1,95 @@
+"""AlertEngine transitions and NotificationLimiter delivery, on plain samples."""
+import os, sys, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DriveCore import AlertEngine, NotificationLimiter
+
+GB = 1024**3
+TOTAL = 100 * GB
+
+
+def transitions(events):
+    return [(e.rule.name, e.drive, e.firing) for e in events]
+
+
+class AlertEngineTest(unittest.TestCase):
+
+    def test_fires_once_and_clears_past_hysteresis(self):
+        engine = AlertEngine([{"name": "low", "free_below_gb": 10, "hysteresis": 0.2}])
+        self.assertEqual(engine.evaluate([("/", 11 * GB, TOTAL)]), [])
+        self.assertEqual(transitions(engine.evaluate([("/", 9 * GB, TOTAL)])), [("low", "/", True)])
+        self.assertEqual(engine.evaluate([("/", 8 * GB, TOTAL)]), [])
+        self.assertTrue(engine.is_firing("/"))
+        # Back above 10 GB but not past 12 GB: still firing
+        self.assertEqual(engine.evaluate([("/", 11.5 * GB, TOTAL)]), [])
+        self.assertEqual(transitions(engine.evaluate([("/", 12.5 * GB, TOTAL)])), [("low", "/", False)])
+        self.assertFalse(engine.is_firing("/"))
+
+    def test_percent_and_time_to_full(self):
+        engine = AlertEngine([{"name": "pct", "free_below_percent": 5, "hysteresis": 0},
+                              {"name": "soon", "drives": "/data*", "fills_within_hours": 24, "hysteresis": 0}])
+        hours = {"/": 1.0, "/data": 12.0}.get
+        events = engine.evaluate([("/", 4 * GB, TOTAL), ("/data", 50 * GB, TOTAL)], hours)
+        self.assertEqual(transitions(events), [("pct", "/", True), ("soon", "/data", True)])
+
+    def test_rules_with_the_same_name_are_separate(self):
+        engine = AlertEngine([{"name": "low", "drives": "/", "free_below_gb": 10, "hysteresis": 0},
+                              {"name": "low", "free_below_gb": 5, "hysteresis": 0}])
+        self.assertEqual(len(engine.evaluate([("/", 8 * GB, TOTAL)])), 1)
+        self.assertEqual(len(engine.evaluate([("/", 4 * GB, TOTAL)])), 1)
+        # Clearing the 5 GB rule leaves the 10 GB one firing
+        events = engine.evaluate([("/", 6 * GB, TOTAL)])
+        self.assertEqual([(e.rule.free_below, e.firing) for e in events], [(5 * GB, False)])
+        self.assertTrue(engine.is_firing("/"))
+
+    def test_rule_without_threshold_is_skipped(self):
+        engine = AlertEngine([{"name": "empty"}, {"name": "low", "free_below_gb": 1}])
+        self.assertEqual([r.name for r in engine.rules], ["low"])
+
+
+class NotificationLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = AlertEngine([{"name": "low", "free_below_gb": 10, "hysteresis": 0}])
+        self.limiter = NotificationLimiter()
+
+    def tick(self, now, *samples):
+        deliver, summary = self.limiter.filter(self.engine.evaluate(samples), now)
+        return transitions(deliver), summary
+
+    def test_cooldown_holds_across_a_recovery(self):
+        self.assertEqual(self.tick(0, ("/", 5 * GB, TOTAL)), ([("low", "/", True)], None))
+        self.assertEqual(self.tick(100, ("/", 20 * GB, TOTAL)), ([("low", "/", False)], None))
+        # Fires again within the hour: not announced, and neither is its recovery
+        self.assertEqual(self.tick(200, ("/", 5 * GB, TOTAL)), ([], None))
+        self.assertEqual(self.tick(300, ("/", 20 * GB, TOTAL)), ([], None))
+        self.assertEqual(self.tick(4000, ("/", 5 * GB, TOTAL)), ([("low", "/", True)], None))
+
+    def test_transitions_that_undo_each_other_are_not_announced(self):
+        drives = [(f"/d{i}", 5 * GB, TOTAL) for i in range(3)]
+        self.assertEqual(len(self.tick(0, *drives)[0]), 3)
+        # The budget is spent, so these wait in the backlog, where each
+        # transition is cancelled by the next before it can go out
+        self.assertEqual(self.tick(1, ("/x", 5 * GB, TOTAL), ("/d0", 20 * GB, TOTAL)), ([], None))
+        self.assertEqual(self.tick(2, ("/x", 20 * GB, TOTAL), ("/d0", 5 * GB, TOTAL)), ([], None))
+        self.assertEqual(self.tick(61), ([], None))
+        self.assertTrue(self.engine.is_firing("/d0"))
+
+    def test_burst_is_folded_into_a_summary(self):
+        drives = [(f"/d{i}", 5 * GB, TOTAL) for i in range(6)]
+        deliver, summary = self.tick(0, *drives)
+        self.assertEqual(deliver, [("low", "/d0", True), ("low", "/d1", True)])
+        self.assertEqual(summary, "4 more drive alerts: /d2, /d3, /d4, …")
+        # The window is spent; nothing goes out until it has passed
+        self.assertEqual(self.tick(30, ("/e", 5 * GB, TOTAL)), ([], None))
+        self.assertEqual(self.tick(61), ([("low", "/e", True)], None))
+
+    def test_silent_rules_are_never_announced(self):
+        self.engine = AlertEngine()  # the default rule colors rows only
+        self.assertEqual(self.tick(0, ("/", 5 * GB, TOTAL)), ([], None))
+        self.assertTrue(self.engine.is_firing("/"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""ConfigStore atomic saves and recovery from the .bak copy."""
+import os, sys, io, json, tempfile, unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DriveCore import ConfigStore
+
+
+class ConfigStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "drive_data.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def load(self, store):
+        # Diagnostics belong on stderr; stdout stays clean for --headless
+        err, out = io.StringIO(), io.StringIO()
+        with redirect_stderr(err), redirect_stdout(out):
+            data = store.load()
+        self.assertEqual(out.getvalue(), "")
+        return data, err.getvalue()
+
+    def test_saves_only_when_changed(self):
+        store = ConfigStore(self.path)
+        self.assertTrue(store.save({"drives": ["/a"]}))
+        self.assertFalse(store.save({"drives": ["/a"]}))
+        self.assertFalse(store.is_dirty({"drives": ["/a"]}))
+        self.assertTrue(store.is_dirty({"drives": ["/b"]}))
+        self.assertEqual(os.listdir(self.tmp.name), ["drive_data.json"])  # no temp file left
+
+    def test_previous_good_config_becomes_the_backup(self):
+        store = ConfigStore(self.path)
+        store.save({"drives": ["/a"]})
+        store.save({"drives": ["/b"]})
+        self.assertEqual(self.read(self.path), {"drives": ["/b"]})
+        self.assertEqual(self.read(self.path + ".bak"), {"drives": ["/a"]})
+
+        fresh = ConfigStore(self.path)
+        self.assertEqual(self.load(fresh)[0], {"drives": ["/b"]})
+        self.assertFalse(fresh.is_dirty({"drives": ["/b"]}))
+
+    def test_torn_config_is_recovered_from_the_backup(self):
+        store = ConfigStore(self.path)
+        store.save({"drives": ["/a"]})
+        store.save({"drives": ["/b"]})
+        with open(self.path, "w") as f:
+            f.write('{"drives": ["/')
+
+        store = ConfigStore(self.path)
+        data, err = self.load(store)
+        self.assertEqual(data, {"drives": ["/a"]})
+        self.assertIn("Recovered settings", err)
+
+        # The torn file must not replace the good backup on the next save
+        store.save({"drives": ["/c"]})
+        self.assertEqual(self.read(self.path), {"drives": ["/c"]})
+        self.assertEqual(self.read(self.path + ".bak"), {"drives": ["/a"]})
+
+    def test_missing_or_unreadable_config_loads_empty(self):
+        self.assertEqual(self.load(ConfigStore(self.path))[0], {})
+        with open(self.path, "w") as f:
+            f.write("not json")
+        data, err = self.load(ConfigStore(self.path))
+        self.assertEqual(data, {})
+        self.assertIn("Config Load Error", err)
+
+
+if __name__ == "__main__":
+    unittest.main()
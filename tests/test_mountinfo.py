@@ -0,0 +1,71 @@
+"""LinuxProvider's /proc/self/mountinfo parser, on a canned mount table."""
+import os, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DriveCore import LinuxProvider
+
+MOUNTINFO = """\
+22 1 259:2 / / rw,relatime shared:1 - ext4 /dev/nvme0n1p2 rw
+23 22 0:21 / /proc rw,nosuid,nodev,noexec,relatime shared:5 - proc proc rw
+24 22 0:22 / /sys rw,nosuid,nodev,noexec,relatime shared:6 - sysfs sysfs rw
+25 22 0:5 / /dev rw,nosuid shared:2 - devtmpfs udev rw,size=8000000k
+26 22 0:25 / /run rw,nosuid,nodev - tmpfs tmpfs rw
+30 22 259:3 / /home rw,relatime shared:30 master:1 - xfs /dev/nvme0n1p3 rw
+31 22 259:2 /var/lib/docker/etc/hosts /etc/hosts rw,relatime - ext4 /dev/nvme0n1p2 rw
+32 22 8:17 /export /srv/data rw,relatime - btrfs /dev/sdb1 rw
+40 22 0:50 / /mnt/backup\\040disk rw,relatime shared:40 - vfat /dev/sdc1 rw
+41 22 0:51 / /mnt/nas rw,relatime shared:41 - nfs4 nas:/export rw
+42 22 0:52 / /mnt/remote rw,nosuid,nodev shared:42 - fuse.sshfs me@host:/ rw
+43 22 0:53 / /run/user/1000/gvfs rw,nosuid,nodev - fuse.gvfsd-fuse gvfsd-fuse rw
+this line is not a mount
+44 22 0:54 / /broken rw
+"""
+
+
+class LinuxProviderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "mountinfo")
+        with open(path, "w") as f:
+            f.write(MOUNTINFO)
+        self.provider = LinuxProvider()
+        self.provider.MOUNTINFO = path
+        self.partitions = self.provider.partitions()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_real_mounts_are_listed(self):
+        self.assertEqual(self.provider.system_drives(self.partitions),
+                         ["/", "/home", "/srv/data", "/mnt/backup disk", "/mnt/nas", "/mnt/remote"])
+        root = self.partitions[0]
+        self.assertEqual((root.device, root.fstype, root.opts), ("/dev/nvme0n1p2", "ext4", "rw,relatime"))
+
+    def test_pseudo_and_malformed_entries_are_dropped(self):
+        mountpoints = {p.mountpoint for p in self.partitions}
+        for hidden in ("/proc", "/sys", "/dev", "/run", "/run/user/1000/gvfs", "/broken"):
+            self.assertNotIn(hidden, mountpoints)
+
+    def test_bind_mount_of_a_listed_filesystem_is_dropped(self):
+        # /etc/hosts is part of /, which is already listed; /srv/data is a
+        # subtree of a filesystem that is mounted nowhere else, so it stays
+        mountpoints = {p.mountpoint for p in self.partitions}
+        self.assertNotIn("/etc/hosts", mountpoints)
+        self.assertIn("/srv/data", mountpoints)
+
+    def test_escaped_mount_point(self):
+        self.assertEqual(self.provider._unescape("/a\\040b\\011c\\134d"), "/a b\tc\\d")
+
+    def test_only_known_local_filesystems_are_batchable(self):
+        batchable = self.provider.batchable
+        self.assertTrue(batchable("/"))
+        self.assertTrue(batchable("/home/me/projects"))
+        self.assertTrue(batchable("/mnt/backup disk"))
+        self.assertFalse(batchable("/mnt/nas"))
+        self.assertFalse(batchable("/mnt/remote/some/dir"))
+
+
+if __name__ == "__main__":
+    unittest.main()
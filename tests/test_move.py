@@ -0,0 +1,39 @@
+"""Mapping drive moves in a view onto the collector's custom drive list."""
+import os, sys, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DriveWidget import move_target
+
+
+class MoveTargetTest(unittest.TestCase):
+    # C: pinned first, custom drives in saved order, then system drives;
+    # the view's filter hides the share \\nas\b
+    order = ["C:\\", "D:\\work", "\\\\nas\\a", "E:\\x", "D:\\", "F:\\"]
+    customs = {"D:\\work", "\\\\nas\\a", "\\\\nas\\b", "E:\\x"}
+
+    def target(self, drive, row=None, step=0):
+        return move_target(self.order, self.customs, drive, row, step)
+
+    def test_steps_skip_rows_the_view_does_not_show(self):
+        self.assertEqual(self.target("E:\\x", step=-1), "\\\\nas\\a")
+        self.assertEqual(self.target("D:\\work", step=1), "\\\\nas\\a")
+        self.assertIsNone(self.target("D:\\work", step=-1))
+        self.assertIsNone(self.target("E:\\x", step=1))
+
+    def test_drop_on_a_custom_row_takes_its_place(self):
+        self.assertEqual(self.target("D:\\work", row=3), "E:\\x")
+        self.assertEqual(self.target("E:\\x", row=1), "D:\\work")
+
+    def test_drop_on_a_system_row_goes_to_the_nearest_end(self):
+        self.assertEqual(self.target("E:\\x", row=0), "D:\\work")       # C: pinned on top
+        self.assertEqual(self.target("D:\\work", row=5), "E:\\x")
+        self.assertEqual(self.target("D:\\work", row=99), "E:\\x")
+
+    def test_system_drives_do_not_move(self):
+        self.assertIsNone(self.target("D:\\", row=1))
+        self.assertIsNone(self.target("C:\\", step=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""SpaceScanner against a small tree in a temporary directory."""
+import os, sys, tempfile, unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DriveCore import SpaceScanner
+
+MB = 1024**2
+
+
+class SpaceScannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for d in ("logs", "data", "data/old"):
+            os.mkdir(os.path.join(self.root, d))
+        self.write("logs/app.log", 2 * MB)
+        self.write("data/old/a.bin", 3 * MB)
+        self.write("data/small.txt", 10)
+        self.scanner = SpaceScanner(workers=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, size, mode="wb"):
+        with open(os.path.join(self.root, name), mode) as f:
+            f.write(b"\0" * size)
+
+    def test_totals_and_largest_files(self):
+        result = self.scanner.scan(self.root)
+        self.assertTrue(result.complete)
+        self.assertEqual(result.total, 5 * MB + 10)
+        children = {os.path.basename(p): b for b, p in result.children}
+        self.assertEqual(children, {"logs": 2 * MB, "data": 3 * MB + 10})
+        self.assertEqual([os.path.basename(p) for _, p in result.largest_files], ["a.bin", "app.log"])
+
+    def test_rescan_sees_a_file_growing_in_place(self):
+        self.scanner.scan(self.root)
+        logs = os.path.join(self.root, "logs")
+        mtime = os.stat(logs).st_mtime_ns
+        self.write("logs/app.log", 50 * MB, "ab")
+        os.utime(logs, ns=(mtime, mtime))  # appending never touches the folder
+
+        result = self.scanner.scan(self.root)
+        self.assertEqual(result.dirs_scanned, 0)
+        self.assertEqual(result.dirs_reused, 4)
+        self.assertEqual(result.largest_files[0], (52 * MB, os.path.join(logs, "app.log")))
+        self.assertEqual(dict((p, b) for b, p in result.children)[logs], 52 * MB)
+
+    def test_rescan_lists_changed_folders_again(self):
+        self.scanner.scan(self.root)
+        self.write("logs/new.log", 4 * MB)
+        result = self.scanner.scan(self.root)
+        self.assertEqual(result.dirs_scanned, 1)
+        self.assertEqual(result.total, 9 * MB + 10)
+
+    def test_cache_drops_least_recently_scanned_folders(self):
+        self.scanner.MAX_CACHED_NAMES = 5
+        dev = os.stat(self.root).st_dev
+        for d in ("logs", "data/old", "data"):
+            self.scanner._list_dir(os.path.join(self.root, d), dev)
+        # logs (2 names) went first to make room for data (3 names)
+        self.assertEqual(list(self.scanner._cache), [os.path.join(self.root, "data/old"),
+                                                     os.path.join(self.root, "data")])
+        self.assertEqual(self.scanner._cached_names, 5)
+
+        self.scanner._list_dir(os.path.join(self.root, "data/old"), dev)  # now most recent
+        self.scanner._list_dir(os.path.join(self.root, "logs"), dev)
+        self.assertEqual(list(self.scanner._cache), [os.path.join(self.root, "data/old"),
+                                                     os.path.join(self.root, "logs")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""volume_id and VolumeIndex grouping of drive paths."""
+import os, sys, tempfile, unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DriveCore
+from DriveCore import VolumeIndex, volume_id
+
+
+class VolumeIdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.a = os.path.join(self.tmp.name, "a")
+        self.b = os.path.join(self.tmp.name, "b")
+        os.mkdir(self.a)
+        os.mkdir(self.b)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_folders_on_one_filesystem_share_an_identity(self):
+        self.assertEqual(volume_id(self.a), volume_id(self.b))
+
+    def test_serial_zero_is_never_an_alias(self):
+        # What some network and WebDAV shares report on Windows
+        real_stat = os.stat
+
+        def serial_zero(path):
+            st = real_stat(path)
+            return os.stat_result(st[:2] + (0,) + st[3:])  # st_dev
+
+        with mock.patch.object(DriveCore.os, "stat", serial_zero):
+            a, b = volume_id(self.a), volume_id(self.b)
+            self.assertNotEqual(a, b)
+            self.assertEqual(a, volume_id(self.a + os.sep))
+
+        index = VolumeIndex()
+        self.assertFalse(index.identify(self.a, a))
+        self.assertFalse(index.identify(self.b, b))
+        self.assertEqual(index.representatives([self.a, self.b]), [self.a, self.b])
+        self.assertEqual(index.aliases(self.a), [self.a])
+
+
+class VolumeIndexTest(unittest.TestCase):
+
+    def test_one_representative_per_volume(self):
+        index = VolumeIndex()
+        self.assertFalse(index.identify("C:\\", (7, 0)))
+        self.assertTrue(index.identify("C:\\Users", (7, 0)))
+        index.identify("D:\\", (9, 0))
+        self.assertEqual(index.representatives(["C:\\", "C:\\Users", "D:\\", "E:\\"]), ["C:\\", "D:\\", "E:\\"])
+        self.assertEqual(index.aliases("C:\\Users"), ["C:\\", "C:\\Users"])
+        self.assertEqual(index.groups(["C:\\", "D:\\", "C:\\Users"]), [["C:\\", "C:\\Users"], ["D:\\"]])
+
+    def test_invalidate_keeps_groups_until_identified_again(self):
+        index = VolumeIndex()
+        index.identify("/mnt/a", (1, 1))
+        index.identify("/mnt/b", (1, 1))
+        index.invalidate()
+        self.assertEqual(index.aliases("/mnt/b"), ["/mnt/a", "/mnt/b"])
+        self.assertEqual(index.representatives(["/mnt/a", "/mnt/b"]), ["/mnt/a", "/mnt/b"])
+        self.assertTrue(index.identify("/mnt/b", (2, 2)))
+        self.assertEqual(index.aliases("/mnt/a"), ["/mnt/a"])
+
+
+if __name__ == "__main__":
+    unittest.main()